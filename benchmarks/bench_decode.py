@@ -0,0 +1,52 @@
+"""
+Compares the struct based `unpack_registers` against the vectorized `decode_registers`, after checking that both
+decode every data type and byte/word order combination identically.
+
+Run from the repository root: `python -m benchmarks.bench_decode`
+"""
+import math
+import random
+import timeit
+from array import array
+
+from visualizer.constants import STRUCT_DATA_TYPE, ENDIANNESS
+from visualizer.utils import unpack_registers
+from visualizer.vectorized import decode_registers
+
+SIZES = (100, 10000, 1000000)
+
+
+def same_values(expected, actual):
+    return all(a == b or (isinstance(a, float) and math.isnan(a) and math.isnan(b)) for a, b in zip(expected, actual)) \
+        and len(expected) == len(actual)
+
+
+def check_identical():
+    data = [random.randrange(65536) for _ in range(1001)]  # Odd length exercises the dropped trailing register.
+    for dtype in STRUCT_DATA_TYPE.values():
+        for byte_order in set(ENDIANNESS.values()):
+            for word_order in set(ENDIANNESS.values()):
+                expected = unpack_registers(data, dtype, byte_order, word_order)
+                actual = decode_registers(data, dtype, byte_order, word_order).tolist()
+                assert same_values(expected, actual), (dtype, byte_order, word_order)
+    print("decode_registers matches unpack_registers for every combination.")
+
+
+def bench():
+    # "list" times include converting the list to an array, "array" times start from an array('H') of registers.
+    print(f"{'registers':>10} {'dtype':>6} {'struct (ms)':>12} {'numpy list':>11} {'numpy array':>12} {'speedup':>8}")
+    for size in SIZES:
+        data = [random.randrange(65536) for _ in range(size)]
+        words = array('H', data)
+        number = max(1, 100000 // size)
+        for dtype in ("H", "L", "f"):
+            struct_time = timeit.timeit(lambda: unpack_registers(data, dtype, "<", "<"), number=number) / number
+            list_time = timeit.timeit(lambda: decode_registers(data, dtype, "<", "<"), number=number) / number
+            array_time = timeit.timeit(lambda: decode_registers(words, dtype, "<", "<"), number=number) / number
+            print(f"{size:>10} {dtype:>6} {struct_time * 1000:>12.3f} {list_time * 1000:>11.3f} "
+                  f"{array_time * 1000:>12.3f} {struct_time / array_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    check_identical()
+    bench()
@@ -0,0 +1,72 @@
+from visualizer.scan_planner import plan_reads, fan_out, split_read
+
+
+def block(start_register, length, function_code=3, **kwargs):
+    return dict({"function_code": function_code, "start_register": start_register, "length": length}, **kwargs)
+
+
+def spans(reads):
+    return [(r["start_register"], r["length"], r["blocks"]) for r in reads]
+
+
+def _test_gap_fill_merge():
+    blocks = [block(0, 10), block(15, 5), block(40, 5)]
+    result = plan_reads(blocks, gap_fill=8)
+    print("Gap fill 8:", spans(result))
+    assert spans(result) == [(0, 20, [0, 1]), (40, 5, [2])]
+
+    result = plan_reads(blocks, gap_fill=0)
+    print("Gap fill 0:", spans(result))
+    assert spans(result) == [(0, 10, [0]), (15, 5, [1]), (40, 5, [2])]
+
+
+def _test_overlapping_and_unsorted_blocks():
+    result = plan_reads([block(20, 10), block(0, 25), block(5, 3)], gap_fill=0)
+    print("Overlapping:", spans(result))
+    assert spans(result) == [(0, 30, [1, 2, 0])]
+
+
+def _test_read_length_limit():
+    result = plan_reads([block(0, 100), block(100, 25), block(125, 1)], gap_fill=8)
+    print("125 register limit:", spans(result))
+    assert spans(result) == [(0, 125, [0, 1]), (125, 1, [2])]
+
+    result = plan_reads([block(0, 1990, function_code=1), block(1990, 10, function_code=1),
+                         block(2000, 1, function_code=1)], gap_fill=8)
+    print("2000 bit limit:", spans(result))
+    assert spans(result) == [(0, 2000, [0, 1]), (2000, 1, [2])]
+
+
+def _test_groups_kept_apart():
+    blocks = [block(0, 5), block(5, 5, function_code=4), block(10, 5, unit_id=2), block(12, 5)]
+    result = plan_reads(blocks, unit_id=1)
+    print("Groups:", [(r["unit_id"], r["function_code"], r["start_register"], r["length"]) for r in result])
+    assert [(r["unit_id"], r["function_code"], r["blocks"]) for r in result] == [(1, 3, [0, 3]), (1, 4, [1]),
+                                                                                (2, 3, [2])]
+
+
+def _test_fan_out_offsets():
+    blocks = [block(10, 2), block(14, 3), block(100, 1)]
+    reads = plan_reads(blocks, gap_fill=8)
+    results = [list(range(10, 17)), []]  # Registers 10 to 16, then a failed read.
+    result = fan_out(blocks, reads, results)
+    print("Fan out:", result)
+    assert result == [[10, 11], [14, 15, 16], None]
+
+
+def _test_split_read():
+    result = split_read(3, 100, 300)
+    print("Split read:", result)
+    assert result == [(100, 125), (225, 125), (350, 50)]
+    assert split_read(1, 0, 2000) == [(0, 2000)]
+
+
+if __name__ == '__main__':
+
+    _test_gap_fill_merge()
+    _test_overlapping_and_unsorted_blocks()
+    _test_read_length_limit()
+    _test_groups_kept_apart()
+    _test_fan_out_offsets()
+    _test_split_read()
+    print("\nAll scan planner tests passed.")
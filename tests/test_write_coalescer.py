@@ -0,0 +1,70 @@
+from visualizer.constants import REGISTER_TYPE_TO_WRITE_FUNCTION_CODE
+from visualizer.write_coalescer import coalesce_writes
+
+REGISTERS = REGISTER_TYPE_TO_WRITE_FUNCTION_CODE["Holding Registers"]
+COILS = REGISTER_TYPE_TO_WRITE_FUNCTION_CODE["Coils"]
+
+
+def write(function_code, start_register, values):
+    return {"function_code": function_code, "start_register": start_register, "values": values}
+
+
+def _test_last_write_wins():
+    result = coalesce_writes([write(REGISTERS, 10, [1, 2, 3]), write(REGISTERS, 11, [20])])
+    print("Last write wins:", result)
+    assert result == [write(REGISTERS, 10, [1, 20, 3])]
+
+
+def _test_contiguous_merge():
+    result = coalesce_writes([write(REGISTERS, 0, [1]), write(REGISTERS, 1, [2]), write(REGISTERS, 5, [3])])
+    print("Contiguous merge:", result)
+    assert result == [write(REGISTERS, 0, [1, 2]), write(REGISTERS, 5, [3])]
+
+
+def _test_single_coil():
+    result = coalesce_writes([write(COILS, 3, True), write(COILS, 4, False)])
+    print("Single coils:", result)
+    assert result == [write(COILS, 3, [True, False])]
+
+
+def _test_register_split():
+    result = coalesce_writes([write(REGISTERS, 0, list(range(200)))])
+    print("Register split:", [(w["start_register"], len(w["values"])) for w in result])
+    assert [(w["start_register"], len(w["values"])) for w in result] == [(0, 123), (123, 77)]
+    assert result[0]["values"] + result[1]["values"] == list(range(200))
+
+
+def _test_coil_split():
+    result = coalesce_writes([write(COILS, 0, [True] * 2000)])
+    print("Coil split:", [(w["start_register"], len(w["values"])) for w in result])
+    assert [(w["start_register"], len(w["values"])) for w in result] == [(0, 1968), (1968, 32)]
+
+
+def _test_order_preserved():
+    # The write holding the value queued last goes out last, even though it has the lowest address.
+    result = coalesce_writes([write(REGISTERS, 100, [1, 2]), write(REGISTERS, 50, [7]), write(REGISTERS, 101, [3])])
+    print("Order preserved:", result)
+    assert result == [write(REGISTERS, 50, [7]), write(REGISTERS, 100, [1, 3])]
+
+    # Overlapping ranges merge into one write, sent in the place of the latest request it holds.
+    result = coalesce_writes([write(REGISTERS, 0, [1, 2, 3]), write(REGISTERS, 200, [9]), write(REGISTERS, 2, [4, 5])])
+    print("Order preserved, overlapping:", result)
+    assert result == [write(REGISTERS, 200, [9]), write(REGISTERS, 0, [1, 2, 4, 5])]
+
+
+def _test_register_spaces_kept_apart():
+    result = coalesce_writes([write(REGISTERS, 0, [1]), write(COILS, 1, [True])])
+    print("Register spaces:", result)
+    assert result == [write(REGISTERS, 0, [1]), write(COILS, 1, [True])]
+
+
+if __name__ == '__main__':
+
+    _test_last_write_wins()
+    _test_contiguous_merge()
+    _test_single_coil()
+    _test_register_split()
+    _test_coil_split()
+    _test_order_preserved()
+    _test_register_spaces_kept_apart()
+    print("\nAll write coalescer tests passed.")
@@ -1,35 +1,76 @@
+import time
+
 from PyQt5.QtCore import QObject, QThread, pyqtSignal, pyqtSlot, Qt
-from PyQt5.QtWidgets import QApplication, QTableWidgetItem, QLineEdit, QWidget, QComboBox, QSpinBox, QDoubleSpinBox
+from PyQt5.QtWidgets import QApplication, QHeaderView, QLineEdit, QWidget, QComboBox, QSpinBox, QDoubleSpinBox, \
+    QAction, QFileDialog, QInputDialog, QDockWidget, QTableView
 
+from visualizer.bit_grid import BitGrid
+from visualizer.bulk_write import build_bulk_write
 from visualizer.gui_main_window import Ui_MainWindow
+from visualizer.log_console import LogConsole
 from visualizer.modbus_worker import ModbusWorker
 from visualizer.constants import REGISTER_TYPE_TO_READ_FUNCTION_CODE, STRUCT_DATA_TYPE, ENDIANNESS, RADIX, \
-    RADIX_PREFIX, REGISTER_TYPE_TO_WRITE_FUNCTION_CODE, TXT_BOOLS
-from visualizer.utils import format_data, serial_ports, format_write_value
+    RADIX_PREFIX, REGISTER_TYPE_TO_WRITE_FUNCTION_CODE, TXT_BOOLS, MAX_READ_LENGTH, LOG_INFO, LOG_WARNING, LOG_ERROR, \
+    LOG_LEVEL_NAMES
+from visualizer.refresh_throttler import RefreshThrottler
+from visualizer.register_table_model import RegisterTableModel
+from visualizer.tag_map import TagMap
+from visualizer.tag_value_model import TagValueModel
+from visualizer.trend_plot import TrendPlot
+from visualizer.utils import serial_ports, format_write_value
+from visualizer.vectorized import decode_registers
 
 
 class VisualizerApp(Ui_MainWindow, QObject):
     modbus_settings_changed = pyqtSignal(dict)
     polling_settings_available = pyqtSignal(int, int, str)
-    poll_request = pyqtSignal()
     write_requested = pyqtSignal()
 
     def __init__(self, main_window):
         super().__init__()
         self.setupUi(main_window)
 
+        self.main_window = main_window
+        self.status_bar = main_window.statusBar()
+        self.actionLoadTagMap = QAction("Load Tag Map...", main_window)
+        self.actionClearTagMap = QAction("Clear Tag Map", main_window)
+        self.menuFile.insertAction(self.actionExit, self.actionLoadTagMap)
+        self.menuFile.insertAction(self.actionExit, self.actionClearTagMap)
+        self.actionBulkWrite = QAction("Bulk Write...", main_window)
+        self.actionWriteRecipe = QAction("Write Recipe File...", main_window)
+        self.menuFile.insertAction(self.actionExit, self.actionBulkWrite)
+        self.menuFile.insertAction(self.actionExit, self.actionWriteRecipe)
+        self.actionTrendSelected = QAction("Trend Selected Registers", main_window)
+        self.menuFile.insertAction(self.actionExit, self.actionTrendSelected)
         self.new_network_settings_flag = False
         self.current_table_data = []
-        self.console_message_number = 0
+        self.changed_cells = []  # Indices of the cells that changed in the last poll.
+        self.device_health = {}  # unit id -> health state reported by the worker
+        self.tag_map = None  # When loaded, polls read the tag map blocks instead of the poll table range.
+        self.tag_values = {}
+        self.trend_registers = []  # Addresses of the poll table registers shown by the trend plot.
+        self.log_console = LogConsole(self.consoleTextEdit, parent=self)
+        self.consoleLevelComboBox = QComboBox(main_window)
+        self.consoleLevelComboBox.addItems(LOG_LEVEL_NAMES)
+        self.consoleLevelComboBox.setCurrentText("Info")
+        self.consoleLevelComboBox.setToolTip("Lowest level of console messages shown")
+        self.status_bar.addPermanentWidget(self.consoleLevelComboBox)
+
+        # Results reach the display through throttlers, so a fast worker can't flood the GUI thread.
+        self.poll_refresh = RefreshThrottler(parent=self)
+        self.scan_refresh = RefreshThrottler(parent=self)
 
         self.worker_thread = QThread()
         self.worker = ModbusWorker()
         self.worker.moveToThread(self.worker_thread)
+        self.worker_thread.started.connect(self.worker.run)
         self.worker_thread.start()
 
+        self.init_bit_grid()
+        self.init_trend_plot()
+        self.init_tag_view()
         self.connect_slots()
         self.init_poll_table()
-        self.update_poll_table_column_headers()
         self.configure_modbus_client()
         self.update_display_settings_options()
         self.init_serial_com_port_combo_box()
@@ -41,15 +82,35 @@ class VisualizerApp(Ui_MainWindow, QObject):
         self.singlePollPushButton.clicked.connect(self.single_poll)
         self.startPollingPushButton.clicked.connect(self.continuous_poll_begin)
         self.stopPollingPushButton.clicked.connect(self.stop_polling)
-        self.startRegisterSpinBox.valueChanged.connect(self.update_poll_table_column_headers)
+        # Clear the table when the start register changes, so old values aren't shown at new addresses.
+        self.startRegisterSpinBox.valueChanged.connect(lambda: self.clear_poll_table(clear_data=True))
         self.registerTypeComboBox.currentTextChanged.connect(lambda: self.clear_poll_table(clear_data=True))
+        self.registerTypeComboBox.currentTextChanged.connect(self.update_register_view)
+        self.bit_grid.bit_clicked.connect(self.on_bit_clicked)
+        self.consoleLevelComboBox.currentTextChanged.connect(
+            lambda name: self.log_console.set_level(LOG_LEVEL_NAMES[name]))
 
-        self.modbus_settings_changed.connect(self.worker.configure_client, Qt.QueuedConnection)
+        # The worker thread is blocked in its command loop, so its methods are called directly to queue commands.
+        self.modbus_settings_changed.connect(self.worker.configure_client, Qt.DirectConnection)
         self.tcpRadioButton.toggled.connect(self.configure_modbus_client, Qt.QueuedConnection)
 
         self.worker.console_message_available.connect(self.write_console, Qt.QueuedConnection)
-        self.worker.data_available.connect(self.write_poll_table)
-        self.poll_request.connect(self.worker.act_on_poll_request, Qt.QueuedConnection)
+        self.worker.device_health_changed.connect(self.on_device_health_changed, Qt.QueuedConnection)
+        self.worker.data_available.connect(lambda result: self.poll_refresh.submit(result, result.block_key),
+                                           Qt.QueuedConnection)
+        self.worker.scan_data_available.connect(self.scan_refresh.submit, Qt.QueuedConnection)
+        self.poll_refresh.refresh.connect(self.on_data_available)
+        self.scan_refresh.refresh.connect(self.on_scan_data_available)
+        # Every sample is trended, but the plot is only redrawn at the refresh rate.
+        self.poll_refresh.sample_available.connect(self.on_poll_sample)
+        self.scan_refresh.sample_available.connect(self.on_scan_sample)
+        self.poll_refresh.refresh.connect(lambda _: self.trend_plot.update())
+        self.scan_refresh.refresh.connect(lambda _: self.trend_plot.update())
+        self.actionTrendSelected.triggered.connect(self.trend_selected_registers)
+        self.actionLoadTagMap.triggered.connect(self.load_tag_map)
+        self.actionClearTagMap.triggered.connect(self.clear_tag_map)
+        self.actionBulkWrite.triggered.connect(self.bulk_write_dialog)
+        self.actionWriteRecipe.triggered.connect(self.write_recipe_file)
         self.write_requested.connect(lambda: self.writeAllPushButton.setEnabled(True))
         self.worker.write_queue_empty.connect(lambda: self.writeAllPushButton.setDisabled(True))
         self.writeAllPushButton.clicked.connect(self.write_all_button_pressed)
@@ -89,111 +150,133 @@ class VisualizerApp(Ui_MainWindow, QObject):
 
     def init_poll_table(self):
         """
-        Initialize the table with QTableWidgetItem objects that are empty strings.
+        Back the table with a `RegisterTableModel` over the raw registers, so only visible cells are ever decoded.
         """
-        num_rows = self.pollTable.rowCount()
-        num_cols = self.pollTable.columnCount()
+        self.poll_table_model = RegisterTableModel(self.pollTable)
+        self.pollTable.setModel(self.poll_table_model)
+        self.pollTable.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.pollTable.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.pollTable.verticalHeader().setDefaultSectionSize(self.pollTable.fontMetrics().height() + 6)
 
-        for j in range(num_cols):
-            for i in range(num_rows):
-                self.pollTable.setItem(i, j, QTableWidgetItem(""))
+        self.poll_table_model.cell_edited.connect(self.on_poll_table_cell_change)
 
-        self.pollTable.itemChanged.connect(self.on_poll_table_cell_change)
+    def init_bit_grid(self):
+        """
+        Coils and discrete inputs are shown in a `BitGrid` in place of the poll table.
+        """
+        self.bit_grid = BitGrid(self.mainFrame)
+        position = self.gridLayout_3.getItemPosition(self.gridLayout_3.indexOf(self.pollTable))
+        self.gridLayout_3.addWidget(self.bit_grid, *position)
+        self.update_register_view()
 
-    def init_serial_com_port_combo_box(self):
-        com_ports = serial_ports()
-        self.serialPortComboBox.insertItems(0, com_ports)
+    def init_trend_plot(self):
+        """
+        The trend plot lives in a dock below the main window, hidden until something is trended.
+        """
+        self.trend_plot = TrendPlot()
+        self.trend_dock = QDockWidget("Trend", self.main_window)
+        self.trend_dock.setWidget(self.trend_plot)
+        self.main_window.addDockWidget(Qt.BottomDockWidgetArea, self.trend_dock)
+        self.trend_dock.hide()
+        self.menuFile.insertAction(self.actionExit, self.trend_dock.toggleViewAction())
+
+    def init_tag_view(self):
+        """
+        Tag values are shown in a dock beside the main window while a tag map is loaded.
+        """
+        self.tag_value_model = TagValueModel(self)
+        self.tag_view = QTableView()
+        self.tag_view.setModel(self.tag_value_model)
+        self.tag_view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.tag_view.verticalHeader().hide()
+        self.tag_dock = QDockWidget("Tags", self.main_window)
+        self.tag_dock.setWidget(self.tag_view)
+        self.main_window.addDockWidget(Qt.RightDockWidgetArea, self.tag_dock)
+        self.tag_dock.hide()
+        self.menuFile.insertAction(self.actionExit, self.tag_dock.toggleViewAction())
 
-    def update_poll_table_column_headers(self):
-        self.clear_poll_table()  # Avoids confusion
+    @pyqtSlot()
+    def update_register_view(self):
+        reg_type = self.registerTypeComboBox.currentText()
+        is_bits = reg_type in ("Coils", "Discrete Inputs")
 
-        start = self.startRegisterSpinBox.value()
-        num_cols = self.pollTable.columnCount()
-        num_rows = self.pollTable.rowCount()
+        self.pollTable.setVisible(not is_bits)
+        self.bit_grid.setVisible(is_bits)
+        self.bit_grid.clear()
+        # The bit grid shows one read of bits. The poll table scrolls through the whole register address space.
+        self.numberOfRegistersSpinBox.setMaximum(MAX_READ_LENGTH[REGISTER_TYPE_TO_READ_FUNCTION_CODE[reg_type]]
+                                                 if is_bits else 65536)
 
-        for i in range(num_cols):
-            self.pollTable.horizontalHeaderItem(i).setText(str(start + i * num_rows))
+    def init_serial_com_port_combo_box(self):
+        com_ports = serial_ports()
+        self.serialPortComboBox.insertItems(0, com_ports)
 
     def clear_poll_table(self, clear_data=False):
-        was_blocked = self.pollTable.blockSignals(True)
-
-        num_rows = self.pollTable.rowCount()
-        num_cols = self.pollTable.columnCount()
-
-        for j in range(num_cols):
-            for i in range(num_rows):
-                self.pollTable.item(i, j).setText("")
+        self.poll_refresh.clear()
+        self.poll_table_model.clear()
         if clear_data:
             self.current_table_data = []
 
-        if not was_blocked:
-            self.pollTable.blockSignals(False)
-
-    @pyqtSlot(list)
-    def write_poll_table(self, data):
-        self.pollTable.blockSignals(True)  # Don't trigger write request when written by application
-
-        self.current_table_data = data
-        self.clear_poll_table()
-        num_rows = self.pollTable.rowCount()
-
-        cur_col = 0
-        dtype = STRUCT_DATA_TYPE[self.dataTypeComboBox.currentText()]
-        byte_order = ENDIANNESS[self.byteEndianessComboBox.currentText()]
-        word_order = ENDIANNESS[self.wordEndianessComboBox.currentText()]
-        base = RADIX[self.numberBaseComboBox.currentText()]
-
-        if self.registerTypeComboBox.currentText() in ("Holding Registers", "Input Registers"):
-            formatted = format_data(data, dtype, byte_order=byte_order, word_order=word_order, base=base)
+    @pyqtSlot(object)
+    def on_data_available(self, result):
+        if result.is_bits:
+            self.bit_grid.set_bits(result.payload, result.length, result.start_register)
         else:
-            formatted = [str(i) for i in data]  # make bools into strings.
+            self.write_poll_table(result.values(), result.start_register, result.failed)
 
-        for i, datum in enumerate(formatted):
-            self.pollTable.item(i % 10, cur_col).setText(datum)
-            # self.pollTable.setItem(i % 10, cur_col, QTableWidgetItem(str(datum)))
-            if (i + 1) % num_rows == 0:
-                cur_col += 1
+    def write_poll_table(self, data, start_register, failed=()):
+        """
+        Show polled registers in the table. The model decodes cells as the view asks for them and only announces the
+        rows whose registers changed. Registers that failed to read are left blank. Coils and discrete inputs are shown
+        by the bit grid instead.
+        """
+        self.current_table_data = data
+        self.poll_table_model.set_display(*self.display_settings())
+        self.changed_cells = self.poll_table_model.set_data(data, start_register, failed)
 
-        self.pollTable.blockSignals(False)
+    def display_settings(self):
+        """
+        :return: Tuple of (dtype, byte_order, word_order, base) selected in the display settings.
+        """
+        return (STRUCT_DATA_TYPE[self.dataTypeComboBox.currentText()],
+                ENDIANNESS[self.byteEndianessComboBox.currentText()],
+                ENDIANNESS[self.wordEndianessComboBox.currentText()],
+                RADIX[self.numberBaseComboBox.currentText()])
 
     @pyqtSlot()
     def configure_modbus_client(self):
         self.worker.clear_write_queue()  # prevent writes to new server when reconfigured.
-
-        if not self.worker.is_busy():
-            tcp_mode = self.tcpRadioButton.isChecked()
-            serial_mode = self.serialRadioButton.isChecked()
-
-            settings = {}
-            if serial_mode:
-                settings["network_type"] = "serial"
-                settings["port"] = self.serialPortComboBox.currentText()
-                settings["protocol"] = self.serialProtocolComboBox.currentText().lower()
-                settings["baudrate"] = self.serialBaudRateSpinBox.value()
-                settings["stop_bits"] = int(self.serialStopBitsComboBox.currentText())
-                settings["byte_size"] = int(self.serialByteSizeComboBox.currentText())
-                settings["parity"] = self.serialParityComboBox.currentText()[0]  # Only uses first capital letter.
-            elif tcp_mode:
-                settings["network_type"] = "tcp"
-                settings["host"] = self.tcpHostLineEdit.text()
-                settings["port"] = self.tcpPortLineEdit.text()
-
-            self.modbus_settings_changed.emit(settings)
-
-            # only mark the network settings as applied when they are actually
-            # updated. We know this is true since this method checks worker.is_busy()
-            self.new_network_settings_flag = False
-
-        else:
-            self.write_console("Busy...")
+        self.device_health = {}  # The worker starts tracking health afresh for the new client.
+        self.status_bar.clearMessage()
+
+        tcp_mode = self.tcpRadioButton.isChecked()
+        serial_mode = self.serialRadioButton.isChecked()
+
+        settings = {}
+        if serial_mode:
+            settings["network_type"] = "serial"
+            settings["port"] = self.serialPortComboBox.currentText()
+            settings["protocol"] = self.serialProtocolComboBox.currentText().lower()
+            settings["baudrate"] = self.serialBaudRateSpinBox.value()
+            settings["stop_bits"] = int(self.serialStopBitsComboBox.currentText())
+            settings["byte_size"] = int(self.serialByteSizeComboBox.currentText())
+            settings["parity"] = self.serialParityComboBox.currentText()[0]  # Only uses first capital letter.
+        elif tcp_mode:
+            settings["network_type"] = "tcp"
+            settings["host"] = self.tcpHostLineEdit.text()
+            settings["port"] = self.tcpPortLineEdit.text()
+
+        # The worker queues the new settings behind any command already pending, so they always get applied.
+        self.modbus_settings_changed.emit(settings)
+        self.new_network_settings_flag = False
 
     def single_poll(self):
-        if self.worker.poll_requests.full():
-            self.write_console("Queue is full")
+        if self.worker.is_polling():
+            self.write_console("Already polling.", LOG_WARNING)
             return
 
         if self.new_network_settings_flag:
-            self.configure_modbus_client()  # Will initiate client update on threaded worker. BLOCKS!
+            self.configure_modbus_client()  # Queues the client update ahead of the poll on the threaded worker.
 
         function_code = REGISTER_TYPE_TO_READ_FUNCTION_CODE[self.registerTypeComboBox.currentText()]
 
@@ -203,17 +286,18 @@ class VisualizerApp(Ui_MainWindow, QObject):
             "length": self.numberOfRegistersSpinBox.value(),
             "unit_id": self.unitIDSpinBox.value()
         }
+        if self.tag_map:
+            request["blocks"] = self.tag_map.blocks
 
-        self.worker.poll_requests.put(request)
-        self.poll_request.emit()
+        self.worker.submit_poll(request)
 
     def continuous_poll_begin(self):
-        if self.worker.poll_requests.full():
-            self.write_console("Queue is full")
+        if self.worker.is_polling():
+            self.write_console("Already polling.", LOG_WARNING)
             return
 
         if self.new_network_settings_flag:
-            self.configure_modbus_client()  # Will initiate client update on threaded worker. BLOCKS!
+            self.configure_modbus_client()  # Queues the client update ahead of the poll on the threaded worker.
 
         function_code = REGISTER_TYPE_TO_READ_FUNCTION_CODE[self.registerTypeComboBox.currentText()]
 
@@ -225,29 +309,23 @@ class VisualizerApp(Ui_MainWindow, QObject):
             "interval": self.updateTimeSpinBox.value(),
             "unit_id": self.unitIDSpinBox.value()
         }
+        if self.tag_map:
+            request["blocks"] = self.tag_map.blocks
 
-        self.worker.poll_requests.put(request)
-        self.poll_request.emit()
+        self.worker.submit_poll(request)
 
     def stop_polling(self):
-        self.worker.stop_polling = True
+        self.worker.request_stop()
         self.write_console("Stopping...")
 
-    @pyqtSlot(QTableWidgetItem)
-    def on_poll_table_cell_change(self, item):
+    @pyqtSlot(int, str)
+    def on_poll_table_cell_change(self, register, txt):
         reg_type = self.registerTypeComboBox.currentText()
 
         if reg_type in ("Discrete Inputs", "Input Registers"):
-            self.write_console("Register Type is Read Only.")
+            self.write_console("Register Type is Read Only.", LOG_WARNING)
             return
 
-        txt = item.text()
-        row = item.row()
-        col = item.column()
-
-        base = int(self.pollTable.horizontalHeaderItem(col).text())
-        register = base + row
-
         vals = None
 
         if reg_type == "Coils":
@@ -260,39 +338,183 @@ class VisualizerApp(Ui_MainWindow, QObject):
             vals = format_write_value(txt, dtype=dtype, byte_order=byte_order, word_order=word_order)
 
         if vals is None:
-            self.write_console(f"Invalid input for register type {reg_type}: {txt}")
+            self.write_console(f"Invalid input for register type {reg_type}: {txt}", LOG_ERROR)
             return
 
         request = {"function_code": REGISTER_TYPE_TO_WRITE_FUNCTION_CODE[self.registerTypeComboBox.currentText()],
                    "start_register": register,
                    "values": vals
                    }
-        self.worker.write_requests.put(request)
+        self.worker.queue_write(request)
         self.write_requested.emit()
         self.write_console(f"Write request added to queue Register: {register}, Value: {vals}")
 
-    def write_all_button_pressed(self):
-        self.worker.write_all_requests()
+    @pyqtSlot(object)
+    def on_scan_sample(self, block_data):
+        """
+        Every scan is decoded and trended. The tag view only shows the latest values, at the refresh rate.
+        """
+        if not self.tag_map or len(block_data) != len(self.tag_map.blocks):
+            return  # Data of a scan list that isn't the current tag map.
+
+        self.tag_values = self.tag_map.decode(block_data)
+        for error in self.tag_map.take_errors():
+            self.write_console(error, LOG_ERROR)
+        if self.trend_plot.names != list(self.tag_values):
+            self.trend_plot.set_series(list(self.tag_values))
+        self.trend_plot.append(time.time(), self.tag_values.values())
+
+    @pyqtSlot(object)
+    def on_scan_data_available(self, block_data):
+        if not self.tag_map or len(block_data) != len(self.tag_map.blocks):
+            return
 
-    @pyqtSlot(str)
-    def write_console(self, msg):
-        _max_lines = 500
-        current_text_lines = self.consoleTextEdit.toPlainText().split('\n')
-        number_of_lines = len(current_text_lines)
+        self.tag_value_model.set_values(self.tag_values)
 
-        if number_of_lines > _max_lines:
-            self.consoleTextEdit.setPlainText('\n'.join(current_text_lines[1:]))  # Rewrite all but the first line.
+    @pyqtSlot(object)
+    def on_poll_sample(self, result):
+        if not self.trend_registers or result.is_bits:
+            return
 
-        # Using `insertPlainText` on `self.consoleTextEdit` uses a different cursor which starts at the end of it's
-        # known document. After the `setPlainText` method is called, that cursor doesnt move, hence why we need a
-        # new cursor to write at the end of the document.
-        cursor = self.consoleTextEdit.textCursor()
-        cursor.movePosition(cursor.End)
-        self.consoleTextEdit.setTextCursor(cursor)
-        cursor.insertText("\n" + f"({self.console_message_number}): " + msg)
+        dtype, byte_order, word_order, _ = self.display_settings()
+        values = decode_registers(result.payload, dtype, byte_order, word_order)
+        width = values.itemsize // 2  # Registers per value
+        trended = []
+        for address in self.trend_registers:
+            i = (address - result.start_register) // width
+            failed = not 0 <= i < len(values) or result.is_failed(address, width)
+            trended.append(None if failed else values[i])
+        self.trend_plot.append(result.timestamp, trended)
 
-        self.consoleTextEdit.ensureCursorVisible()  # Auto scroll to bottom
-        self.console_message_number += 1
+    @pyqtSlot()
+    def trend_selected_registers(self):
+        """
+        Trend the registers selected in the poll table, as decoded by the current display settings.
+        """
+        image = self.poll_table_model.image
+        cells = {self.poll_table_model.cell(index) for index in self.pollTable.selectionModel().selectedIndexes()}
+        cells = sorted({cell - cell % image.width for cell in cells if cell < len(image)})  # Whole values only.
+        if not cells:
+            self.write_console("Select registers in the poll table to trend.", LOG_WARNING)
+            return
+
+        self.trend_registers = [image.start_register + cell for cell in cells]
+        self.trend_plot.set_series([str(address) for address in self.trend_registers])
+        self.trend_dock.show()
+
+    @pyqtSlot()
+    def load_tag_map(self):
+        path, _ = QFileDialog.getOpenFileName(self.main_window, "Load Tag Map", "", "Tag Maps (*.csv);;All Files (*)")
+        if not path:
+            return
+
+        try:
+            self.tag_map = TagMap.from_file(path, unit_id=self.unitIDSpinBox.value())
+        except (OSError, ValueError) as e:
+            self.write_console(f"Failed to load tag map: {e}", LOG_ERROR)
+            return
+
+        self.tag_values = {}
+        self.tag_value_model.clear()
+        self.tag_dock.show()
+        self.write_console(f"Loaded {len(self.tag_map.tags)} tags from {path}, "
+                           f"read as {len(self.tag_map.blocks)} blocks.")
+
+    @pyqtSlot()
+    def clear_tag_map(self):
+        self.tag_map = None
+        self.tag_values = {}
+        self.tag_value_model.clear()
+        self.tag_dock.hide()
+        self.trend_plot.set_series([str(address) for address in self.trend_registers])
+        self.write_console("Tag map cleared. Polls read the poll table range again.")
+
+    @pyqtSlot()
+    def bulk_write_dialog(self):
+        start = self.startRegisterSpinBox.value()
+        text, ok = QInputDialog.getMultiLineText(self.main_window, "Bulk Write",
+                                                 f"Values to write from register {start}, separated by commas or new "
+                                                 f"lines:")
+        if ok:
+            self.queue_bulk_write(text)
+
+    @pyqtSlot()
+    def write_recipe_file(self):
+        path, _ = QFileDialog.getOpenFileName(self.main_window, "Write Recipe File", "",
+                                              "Recipes (*.csv *.txt);;All Files (*)")
+        if not path:
+            return
+
+        try:
+            with open(path) as f:
+                text = f.read()
+        except OSError as e:
+            self.write_console(f"Failed to read recipe: {e}", LOG_ERROR)
+            return
+
+        self.queue_bulk_write(text)
+
+    def queue_bulk_write(self, text):
+        """
+        Validate and encode a block of values with the current display settings, then queue them as one write starting
+        at the start register. Nothing is queued if any value is invalid.
+        """
+        reg_type = self.registerTypeComboBox.currentText()
+
+        if reg_type in ("Discrete Inputs", "Input Registers"):
+            self.write_console("Register Type is Read Only.", LOG_WARNING)
+            return
+
+        dtype = None  # Coils
+        if reg_type == "Holding Registers":
+            dtype = STRUCT_DATA_TYPE[self.dataTypeComboBox.currentText()]
+        byte_order = ENDIANNESS[self.byteEndianessComboBox.currentText()]
+        word_order = ENDIANNESS[self.wordEndianessComboBox.currentText()]
+        start = self.startRegisterSpinBox.value()
+
+        request, errors = build_bulk_write(text, REGISTER_TYPE_TO_WRITE_FUNCTION_CODE[reg_type], start, dtype=dtype,
+                                           byte_order=byte_order, word_order=word_order)
+        if errors:
+            self.write_console("Bulk write rejected, nothing was queued:", LOG_ERROR)
+            for error in errors[:10]:
+                self.write_console(error, LOG_ERROR)
+            if len(errors) > 10:
+                self.write_console(f"... and {len(errors) - 10} more.", LOG_ERROR)
+            return
+
+        self.worker.queue_write(request)
+        self.write_requested.emit()
+        self.write_console(f"Bulk write of {len(request['values'])} {'coils' if dtype is None else 'registers'} "
+                           f"from register {start} added to queue.")
+
+    @pyqtSlot(int, bool)
+    def on_bit_clicked(self, address, value):
+        if self.registerTypeComboBox.currentText() == "Discrete Inputs":
+            self.write_console("Register Type is Read Only.", LOG_WARNING)
+            return
+
+        request = {"function_code": REGISTER_TYPE_TO_WRITE_FUNCTION_CODE["Coils"],
+                   "start_register": address,
+                   "values": value
+                   }
+        self.worker.queue_write(request)
+        self.write_requested.emit()
+        self.write_console(f"Write request added to queue Register: {address}, Value: {value}")
+
+    @pyqtSlot(int, str)
+    def on_device_health_changed(self, unit_id, state):
+        self.device_health[unit_id] = state
+        self.status_bar.showMessage(" | ".join(f"Unit {u}: {st}" for u, st in sorted(self.device_health.items())))
+
+    def write_all_button_pressed(self):
+        self.worker.request_write()
+
+    @pyqtSlot(str, int)
+    def write_console(self, msg, level=LOG_INFO):
+        """
+        :param level: One of the `LOG_` levels in `constants`.
+        """
+        self.log_console.write(msg, level)
 
     def update_display_settings_options(self):
         if self.registerTypeComboBox.currentText() in ("Coils", "Discrete Inputs"):
@@ -316,8 +538,10 @@ class VisualizerApp(Ui_MainWindow, QObject):
         else:
             self.wordEndianessComboBox.setEnabled(True)
 
-        self.write_poll_table(self.current_table_data)  # Write the table again with the updated display settings.
+        self.poll_table_model.set_display(*self.display_settings())  # Visible cells are decoded again.
 
     def exit(self):
         self.worker.shutdown()
+        self.worker_thread.quit()
+        self.worker_thread.wait()
         QApplication.quit()
@@ -0,0 +1,260 @@
+import asyncio
+import time
+
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from visualizer.constants import DEFAULT_GAP_FILL, DEFAULT_PIPELINE_WINDOW, LOG_INFO, LOG_ERROR
+from visualizer.device_health import DeviceHealth
+from visualizer.modbus_tcp import encode_read_request, decode_header, decode_read_response, MBAP_HEADER, \
+    ModbusExceptionResponse
+from visualizer.scan_planner import plan_reads, fan_out, split_read
+
+
+class AsyncTcpDevice:
+    """
+    One Modbus TCP device polled by the `AsyncPollEngine`, with its own scan list, socket and timeout. Requests are
+    pipelined with up to `window` transactions in flight, and replies are matched to them by transaction ID.
+    """
+    def __init__(self, name, host, port, blocks, unit_id=255, timeout=1.0, gap_fill=DEFAULT_GAP_FILL,
+                 window=DEFAULT_PIPELINE_WINDOW):
+        self.name = name
+        self.host = host
+        self.port = int(port)
+        self.blocks = blocks
+        self.unit_id = unit_id
+        self.timeout = timeout
+        self.window = max(1, window)
+        self.reads = plan_reads(blocks, gap_fill=gap_fill, unit_id=unit_id)
+        self.health = DeviceHealth()
+
+        self.reader = None
+        self.writer = None
+        self.transaction_id = 0
+        self.pending = {}  # transaction id -> future waiting for the response PDU
+        self.in_flight = None  # Semaphore limiting outstanding transactions, created on the engine loop.
+        self.receiver = None
+
+    @property
+    def connected(self):
+        return self.writer is not None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port),
+                                                          self.timeout)
+        self.in_flight = asyncio.Semaphore(self.window)
+        self.receiver = asyncio.ensure_future(self.receive_responses())
+
+    def close(self):
+        if self.receiver:
+            self.receiver.cancel()
+        if self.writer:
+            self.writer.close()
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(ConnectionResetError("Connection closed"))
+        self.pending = {}
+        self.reader = None
+        self.writer = None
+        self.receiver = None
+
+    def next_transaction_id(self):
+        self.transaction_id = (self.transaction_id + 1) & 0xFFFF
+        return self.transaction_id
+
+    async def receive_responses(self):
+        """
+        Hand each response on the socket to the request waiting for its transaction ID, in whatever order they arrive.
+        """
+        try:
+            while True:
+                transaction_id, pdu_length = decode_header(await self.reader.readexactly(MBAP_HEADER.size))
+                pdu = await self.reader.readexactly(pdu_length)
+
+                future = self.pending.pop(transaction_id, None)
+                if future and not future.done():  # Done means the request already timed out.
+                    future.set_result(pdu)
+        except (OSError, asyncio.IncompleteReadError):
+            self.receiver = None
+            self.close()
+
+    async def read(self, function_code, start_register, length, unit_id):
+        """
+        Issue one read and wait up to `timeout` for its response.
+        """
+        async with self.in_flight:
+            if not self.connected:
+                raise ConnectionResetError("Connection closed")
+
+            transaction_id = self.next_transaction_id()
+            future = asyncio.get_event_loop().create_future()
+            self.pending[transaction_id] = future
+            self.writer.write(encode_read_request(transaction_id, unit_id, function_code, start_register, length))
+
+            try:
+                pdu = await asyncio.wait_for(future, self.timeout)
+            finally:
+                self.pending.pop(transaction_id, None)
+
+        return decode_read_response(pdu, length)
+
+    async def read_chunked(self, function_code, start_register, length, unit_id):
+        chunks = await asyncio.gather(*(self.read(function_code, chunk_start, chunk_length, unit_id)
+                                        for chunk_start, chunk_length in split_read(function_code, start_register,
+                                                                                    length)))
+        return [value for chunk in chunks for value in chunk]
+
+    async def scan(self):
+        """
+        Read the whole scan list of the device once, with all reads pipelined.
+
+        :return: Tuple of (data, errors). `data` is a list of data per block, `None` for blocks whose read failed.
+            `errors` holds the exception of each failed read.
+        """
+        results = await asyncio.gather(*(self.read_chunked(r["function_code"], r["start_register"], r["length"],
+                                                           r["unit_id"]) for r in self.reads),
+                                       return_exceptions=True)
+        errors = [r for r in results if isinstance(r, Exception)]
+        data = fan_out(self.blocks, self.reads, [[] if isinstance(r, Exception) else r for r in results])
+        return data, errors
+
+
+class AsyncPollEngine(QObject):
+    """
+    Polls many Modbus TCP devices concurrently from a single asyncio event loop. Meant to be moved to its own QThread
+    like the `ModbusWorker`, with `run` triggered through a queued signal.
+    """
+    data_available = pyqtSignal(str, list)  # Device name, one list of data per scan list block.
+    device_health_changed = pyqtSignal(str, str)  # Device name, one of the `device_health` states.
+    console_message_available = pyqtSignal(str, int)  # Message, one of the `LOG_` levels in `constants`.
+    polling_started = pyqtSignal()
+    polling_finished = pyqtSignal()
+
+    def __init__(self):
+        super().__init__()
+
+        self.devices = {}
+        self.loop = None
+        self.stop_event = None
+
+    def add_device(self, name, host, port, blocks, unit_id=255, timeout=1.0, gap_fill=DEFAULT_GAP_FILL,
+                   window=DEFAULT_PIPELINE_WINDOW):
+        """
+        Thread safe. While the engine runs, the device joins from the next scan cycle.
+        """
+        device = AsyncTcpDevice(name, host, port, blocks, unit_id=unit_id, timeout=timeout, gap_fill=gap_fill,
+                                window=window)
+        self.call_in_loop(self.devices.__setitem__, name, device)
+
+    def remove_device(self, name):
+        """
+        Thread safe. While the engine runs, the device is closed on the engine loop.
+        """
+        self.call_in_loop(self.drop_device, name)
+
+    def drop_device(self, name):
+        device = self.devices.pop(name, None)
+        if device:
+            device.close()
+
+    def call_in_loop(self, function, *args):
+        """
+        Call `function` on the engine loop while it runs, so `devices` and the sockets are only touched by that thread,
+        or straight away otherwise.
+        """
+        loop = self.loop
+        if loop:
+            try:
+                loop.call_soon_threadsafe(function, *args)
+                return
+            except RuntimeError:
+                pass  # The loop closed in the meantime.
+        function(*args)
+
+    @pyqtSlot(float)
+    def run(self, interval):
+        """
+        Scan every device once per `interval` seconds until `stop` is called. Blocks the calling thread.
+        """
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.stop_event = asyncio.Event()
+
+        self.polling_started.emit()
+        try:
+            self.loop.run_until_complete(self.poll_forever(interval))
+        finally:
+            for device in self.devices.values():
+                device.close()
+            self.loop.run_until_complete(asyncio.sleep(0))  # Let the cancelled receivers unwind first.
+            self.loop.close()
+            self.loop = None
+            self.polling_finished.emit()
+            self.console_message_available.emit("Polling Stopped.", LOG_INFO)
+
+    def stop(self):
+        """
+        Thread safe request to stop the engine at the end of the current scan cycle.
+        """
+        if self.loop:
+            self.loop.call_soon_threadsafe(self.stop_event.set)
+
+    async def poll_forever(self, interval):
+        while not self.stop_event.is_set():
+            start = time.monotonic()
+
+            # Every device scans concurrently, so the cycle lasts as long as the slowest device.
+            await asyncio.gather(*(self.scan_device(d) for d in list(self.devices.values())))
+
+            remaining = interval - (time.monotonic() - start)
+            if remaining > 0:
+                try:
+                    await asyncio.wait_for(self.stop_event.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def scan_device(self, device):
+        health = device.health
+        if not health.should_poll():
+            return  # Backing off or offline, don't let it hold up the cycle.
+
+        try:
+            if not device.connected:
+                await device.connect()
+
+            if health.probing:
+                first = device.blocks[0]
+                await device.read(first["function_code"], first["start_register"], 1,
+                                  first.get("unit_id", device.unit_id))
+
+            data, errors = await device.scan()
+            # Exception replies prove the device is answering too.
+            responsive = any(d is not None for d in data) or any(isinstance(e, ModbusExceptionResponse) for e in errors)
+
+        except ModbusExceptionResponse as e:
+            # An exception reply to the probe still proves the device is answering, so the connection is kept.
+            data, errors = [None] * len(device.blocks), []
+            responsive = True
+            self.console_message_available.emit(f"{device.name}: {e}", LOG_ERROR)
+
+        except (OSError, asyncio.TimeoutError):
+            data, errors = [None] * len(device.blocks), []
+            responsive = False
+            self.console_message_available.emit(f"{device.name}: Connection Failed.", LOG_ERROR)
+            device.close()
+
+        for e in errors:
+            if isinstance(e, ModbusExceptionResponse):
+                self.console_message_available.emit(f"{device.name}: {e}", LOG_ERROR)
+            else:
+                self.console_message_available.emit(f"{device.name}: Poll Failed.", LOG_ERROR)
+                device.close()  # Socket is in an unknown state after a timeout, reconnect on the next cycle.
+                break
+
+        if responsive:
+            changed = health.record_success()
+        else:
+            changed = health.record_failure()
+        if changed:
+            self.device_health_changed.emit(device.name, health.state)
+
+        self.data_available.emit(device.name, data)
@@ -0,0 +1,104 @@
+from PyQt5.QtCore import Qt, QRect, QSize, QEvent, pyqtSignal
+from PyQt5.QtGui import QPainter, QColor
+from PyQt5.QtWidgets import QWidget, QToolTip
+
+from visualizer.poll_result import changed_bits
+
+BIT_ON_COLOR = QColor(46, 160, 67)
+BIT_OFF_COLOR = QColor(210, 210, 210)
+BIT_EMPTY_COLOR = QColor(245, 245, 245)
+
+
+class BitGrid(QWidget):
+    """
+    Compact view of a block of coils or discrete inputs, painted straight from the packed bits with one small square per
+    bit. Only the squares of bits that toggled are repainted on each poll.
+    """
+    bit_clicked = pyqtSignal(int, bool)  # Address, the opposite of its current state.
+
+    def __init__(self, parent=None, columns=80, cell_size=12):
+        super().__init__(parent)
+        self.columns = columns
+        self.cell_size = cell_size
+        self.packed = b""
+        self.length = 0
+        self.start_register = 0
+
+        self.setMouseTracking(True)
+        self.setMinimumSize(self.sizeHint())
+
+    def sizeHint(self):
+        rows = max(1, (self.length + self.columns - 1) // self.columns)
+        return QSize(self.columns * self.cell_size + 1, rows * self.cell_size + 1)
+
+    def cell_rect(self, index):
+        row, column = divmod(index, self.columns)
+        return QRect(column * self.cell_size, row * self.cell_size, self.cell_size, self.cell_size)
+
+    def index_at(self, pos):
+        column = pos.x() // self.cell_size
+        index = pos.y() // self.cell_size * self.columns + column
+        return index if 0 <= column < self.columns and 0 <= index < self.length else None
+
+    def bit(self, index):
+        return bool(self.packed[index >> 3] >> (index & 7) & 1)
+
+    def set_bits(self, packed, length, start_register):
+        """
+        Show a new poll of the block.
+
+        :param packed: The bits, packed by `pack_bits`.
+        """
+        same_layout = length == self.length and start_register == self.start_register
+        changed = changed_bits(self.packed, packed, length) if same_layout else None
+
+        self.packed = packed
+        self.length = length
+        self.start_register = start_register
+
+        if changed is None:
+            self.setMinimumSize(self.sizeHint())
+            self.updateGeometry()
+            self.update()
+        elif len(changed) > self.columns:
+            self.update()  # One full repaint is cheaper than many small ones.
+        else:
+            for index in changed:
+                self.update(self.cell_rect(index))
+
+    def clear(self):
+        self.set_bits(b"", 0, 0)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        area = event.rect()
+        size = self.cell_size
+
+        first_row = max(0, area.top() // size)
+        last_row = min((self.length - 1) // self.columns, area.bottom() // size) if self.length else -1
+        first_column = max(0, area.left() // size)
+        last_column = min(self.columns - 1, area.right() // size)
+
+        painter.fillRect(area, BIT_EMPTY_COLOR)
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                index = row * self.columns + column
+                if index >= self.length:
+                    break
+                painter.fillRect(column * size + 1, row * size + 1, size - 1, size - 1,
+                                 BIT_ON_COLOR if self.bit(index) else BIT_OFF_COLOR)
+
+    def mousePressEvent(self, event):
+        index = self.index_at(event.pos())
+        if index is not None and event.button() == Qt.LeftButton:
+            self.bit_clicked.emit(self.start_register + index, not self.bit(index))
+
+    def event(self, event):
+        if event.type() == QEvent.ToolTip:
+            index = self.index_at(event.pos())
+            if index is None:
+                QToolTip.hideText()
+            else:
+                QToolTip.showText(event.globalPos(), f"{self.start_register + index}: {self.bit(index)}", self)
+            return True
+        return super().event(event)
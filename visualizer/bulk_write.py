@@ -0,0 +1,113 @@
+import math
+import re
+import struct
+
+from visualizer.codec import get_decode_plan
+from visualizer.constants import RADIX_PREFIX, TXT_BOOLS
+
+VALUE_SEPARATORS = re.compile(r"[\s,;]+")
+
+# Smallest and largest value of each integer data type, so a whole batch is range checked before encoding.
+INTEGER_RANGES = {"H": (0, 0xFFFF),
+                  "h": (-0x8000, 0x7FFF),
+                  "L": (0, 0xFFFFFFFF),
+                  "l": (-0x80000000, 0x7FFFFFFF)}
+FLOAT32_MAX = 3.4028234663852886e38
+
+
+def split_values(text):
+    """
+    Split pasted text (a column, a CSV row or a whole CSV file) into value strings.
+    """
+    return [token for token in VALUE_SEPARATORS.split(text) if token]
+
+
+def parse_number(token, dtype):
+    """
+    Parse one value for a register data type. Integers may have a sign and a 0x/0o/0b radix prefix.
+
+    :raises ValueError: When the token isn't a valid value of the data type.
+    """
+    if dtype == 'f':
+        value = float(token)
+        if not math.isinf(value) and abs(value) > FLOAT32_MAX:
+            raise ValueError("out of range for a 32 bit float")
+        return value
+
+    sign = '-' if token[:1] == '-' else ''
+    digits = token.lstrip('+-')
+    radix = RADIX_PREFIX.get(digits[:2].lower(), 10)
+    value = int(sign + (digits[2:] if radix != 10 else digits), radix)
+
+    low, high = INTEGER_RANGES[dtype]
+    if not low <= value <= high:
+        raise ValueError(f"out of range {low} to {high}")
+    return value
+
+
+def parse_values(tokens, dtype=None):
+    """
+    Parse every value of a bulk write, collecting all the errors instead of stopping at the first.
+
+    :param tokens: Value strings, as returned by `split_values`.
+    :param dtype: struct format character of the register data type, or `None` for coils.
+    :return: Tuple of (values, errors). `errors` is a list of (index, token, reason).
+    """
+    values = []
+    errors = []
+    for index, token in enumerate(tokens):
+        try:
+            if dtype is None:
+                values.append(TXT_BOOLS[token.lower()])
+            else:
+                values.append(parse_number(token, dtype))
+        except (ValueError, KeyError) as e:
+            errors.append((index, token, str(e) if dtype is not None else "not a coil state"))
+    return values, errors
+
+
+def encode_values(values, dtype='H', byte_order='>', word_order='>'):
+    """
+    Encode many values of one data type to registers in a single pass, using the cached `DecodePlan` for the layout.
+
+    :raises struct.error: When a value doesn't fit the data type.
+    :raises OverflowError: When a float is too large for 32 bits after rounding.
+    :return: List of registers.
+    """
+    registers = len(values) * struct.calcsize(">" + dtype) // 2
+    return list(get_decode_plan(dtype, byte_order, word_order, registers).encode(values))
+
+
+def build_bulk_write(text, function_code, start_register, dtype=None, byte_order='>', word_order='>'):
+    """
+    Turn pasted or loaded values into a single write request of one contiguous payload. Everything is validated before
+    anything is encoded, so a bad value never results in a partial write.
+
+    :param text: Values separated by commas, semicolons, whitespace or new lines.
+    :param function_code: Write function code.
+    :param start_register: Address of the first value.
+    :param dtype: struct format character of the register data type, or `None` for coils.
+    :return: Tuple of (request, errors). `request` is a write request dict, or `None` when there were errors.
+        `errors` is a list of messages.
+    """
+    tokens = split_values(text)
+    if not tokens:
+        return None, ["No values to write."]
+
+    values, errors = parse_values(tokens, dtype)
+    messages = [f"Value {index + 1} ({token}): {reason}" for index, token, reason in errors]
+
+    payload = values if dtype is None else None
+    if not messages and dtype is not None:
+        try:
+            payload = encode_values(values, dtype, byte_order, word_order)
+        except (OverflowError, struct.error) as e:
+            messages.append(f"Values could not be encoded: {e}")
+
+    if not messages and start_register + len(payload) > 65536:
+        messages.append(f"{len(payload)} registers from {start_register} exceeds the address space.")
+
+    if messages:
+        return None, messages
+
+    return {"function_code": function_code, "start_register": start_register, "values": payload}, []
@@ -0,0 +1,60 @@
+import struct
+from functools import lru_cache
+
+from visualizer.radix import make_renderer
+
+FLIPPED_ORDER = {">": "<", "<": ">"}
+
+
+class DecodePlan:
+    """
+    Everything needed to decode one block layout, worked out once: the precompiled structs, the value size and count,
+    and the renderer that turns the values into display strings. Get instances through `get_decode_plan` so they are
+    shared by everything decoding the same layout.
+    """
+    def __init__(self, dtype, byte_order=">", word_order=">", length=0, base=10):
+        self.dtype = dtype
+        self.length = length
+        self.base = base
+        self.size = struct.calcsize(">" + dtype)  # Standard sizes. A native 'L' is 8 bytes on some platforms.
+        self.count = length * 2 // self.size  # Registers at the end that don't fill a whole value are dropped.
+
+        if self.size == 4:
+            # Little endian word order reverses the bytes of each register before unpacking the whole value as little
+            # endian. Packing the registers with the flipped byte order does that swap for free.
+            pack_order = FLIPPED_ORDER[byte_order] if word_order == "<" else byte_order
+            unpack_order = word_order
+        else:
+            pack_order = byte_order
+            unpack_order = ">"
+
+        self.packer = struct.Struct(pack_order + "H" * length)
+        self.unpacker = struct.Struct(unpack_order + dtype * self.count)
+
+        self.render = make_renderer(self.size, base=base, is_float=dtype == 'f', signed=dtype.islower())
+
+    def decode(self, data):
+        """
+        :param data: Exactly `length` registers.
+        :return: Tuple of `count` values.
+        """
+        return self.unpacker.unpack_from(self.packer.pack(*data))
+
+    def encode(self, values):
+        """
+        Inverse of `decode`.
+
+        :param values: Exactly `count` values.
+        :raises struct.error: When a value doesn't fit the data type.
+        :return: Tuple of `length` registers.
+        """
+        return self.packer.unpack(self.unpacker.pack(*values))
+
+
+@lru_cache(maxsize=256)
+def get_decode_plan(dtype, byte_order=">", word_order=">", length=0, base=10):
+    """
+    Cached `DecodePlan` for a (dtype, byte order, word order, length, base) layout. The least recently used plans are
+    dropped once the cache is full.
+    """
+    return DecodePlan(dtype, byte_order=byte_order, word_order=word_order, length=length, base=base)
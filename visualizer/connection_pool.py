@@ -0,0 +1,114 @@
+import select
+import socket
+import time
+from collections import OrderedDict
+
+# Settings whose values are compared case-insensitively. Others, such as serial port paths, are case-sensitive.
+CASE_INSENSITIVE_SETTINGS = ("network_type", "host", "protocol")
+
+
+def settings_key(settings):
+    """
+    Normalize a settings dict from `VisualizerApp.configure_modbus_client` into a hashable pool key, so equivalent
+    settings (e.g. port "502" and 502, or host "Localhost " and "localhost") map to the same connection.
+    """
+    normalized = {k: str(v).strip() for k, v in settings.items()}
+    return tuple(sorted((k, v.lower() if k in CASE_INSENSITIVE_SETTINGS else v) for k, v in normalized.items()))
+
+
+def socket_alive(sock):
+    """
+    Cheap, non-blocking health check of an idle TCP socket. An idle socket has nothing to read, so a readable one has
+    either been closed by the peer or holds a stale reply that would be mistaken for the answer to the next request.
+    Either way it isn't reused.
+    """
+    try:
+        readable, _, errored = select.select([sock], [], [sock], 0)
+    except (OSError, ValueError):
+        return False
+    return not readable and not errored
+
+
+class ConnectionPool:
+    """
+    Keeps connected Modbus clients warm for recently used endpoints so switching between devices doesn't pay for a new
+    connection every time. Entries are evicted least recently used first when the pool is full, or once they have been
+    idle for `idle_timeout` seconds. The active entry is never evicted.
+    """
+    def __init__(self, create_client, max_size=4, idle_timeout=300.0, clock=time.monotonic):
+        """
+        :param create_client: Callable taking a settings dict and returning a new, unconnected client.
+        """
+        self.create_client = create_client
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+
+        self.entries = OrderedDict()  # key -> [client, settings, last_used], least recently used first.
+        self.active_key = None
+
+    def acquire(self, settings):
+        """
+        Get a connected client for `settings`, reusing a pooled one when it is still healthy.
+
+        :return: Tuple of (client, reused). `client` is None if one couldn't be created for the settings.
+        """
+        self.touch()  # The previous endpoint's idle time starts now.
+        self.evict_idle()
+        key = settings_key(settings)
+
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            if self.is_healthy(entry[0]):
+                entry[2] = self.clock()
+                self.entries[key] = entry
+                self.active_key = key
+                return entry[0], True
+            entry[0].close()
+
+        if settings.get("network_type") == "serial":
+            self.close_matching(lambda s: s.get("port") == settings.get("port"))  # Only one client may own a port.
+
+        client = self.create_client(settings)
+        if client is None:
+            return None, False
+
+        client.connect()
+        self.entries[key] = [client, settings, self.clock()]
+        self.active_key = key
+
+        while len(self.entries) > self.max_size:
+            lru_key = next(k for k in self.entries if k != self.active_key)
+            self.entries.pop(lru_key)[0].close()
+
+        return client, False
+
+    def touch(self):
+        """
+        Mark the active entry as used now.
+        """
+        if self.active_key in self.entries:
+            self.entries[self.active_key][2] = self.clock()
+
+    def evict_idle(self):
+        now = self.clock()
+        for key in [k for k, e in self.entries.items() if k != self.active_key and now - e[2] > self.idle_timeout]:
+            self.entries.pop(key)[0].close()
+
+    def close_matching(self, predicate):
+        for key in [k for k, e in self.entries.items() if predicate(e[1])]:
+            self.entries.pop(key)[0].close()
+            if key == self.active_key:
+                self.active_key = None
+
+    def close_all(self):
+        self.close_matching(lambda s: True)
+
+    @staticmethod
+    def is_healthy(client):
+        sock = getattr(client, "socket", None)
+        if sock is None:
+            return False
+        if isinstance(sock, socket.socket):
+            return socket_alive(sock)
+        return getattr(sock, "is_open", True)  # pyserial ports report whether they are still open.
@@ -44,4 +44,44 @@ TXT_BOOLS = {"true": True,
              "on": True,
              "off": False,
              "1": True,
-             "0": False}
\ No newline at end of file
+             "0": False}
+
+# Largest quantity a single read request may ask for, per the Modbus application protocol spec.
+MAX_READ_LENGTH = {0x01: 2000,
+                   0x02: 2000,
+                   0x03: 125,
+                   0x04: 125}
+
+DEFAULT_GAP_FILL = 8  # Unwanted registers a scan list read may span to merge two blocks into one request.
+
+# Largest quantity a single write request may carry, keyed like REGISTER_TYPE_TO_WRITE_FUNCTION_CODE.
+MAX_WRITE_LENGTH = {0x15: 1968,
+                    0x16: 123}
+
+DEFAULT_PIPELINE_WINDOW = 4  # Modbus TCP requests allowed in flight at once. 1 disables pipelining.
+
+# Tag map types and the struct format character each is decoded with. BIT tags decode one bit of a register.
+TAG_TYPES = {"U16": "H",
+             "S16": "h",
+             "U32": "L",
+             "S32": "l",
+             "F32": "f",
+             "BIT": "H"}
+DERIVED_TAG_TYPE = "EXPR"  # Tags computed from other tags by an expression instead of read from the device.
+
+TAG_BYTE_ORDERS = {">": ">",
+                   "<": "<",
+                   "big": ">",
+                   "little": "<"}
+
+DEFAULT_REFRESH_RATE = 30  # Most times a second the display is refreshed with new poll results.
+# Console message levels, lowest first, and the names they are filtered by.
+LOG_DEBUG = 10
+LOG_INFO = 20
+LOG_WARNING = 30
+LOG_ERROR = 40
+LOG_LEVEL_NAMES = {"Debug": LOG_DEBUG, "Info": LOG_INFO, "Warning": LOG_WARNING, "Error": LOG_ERROR}
+
+DEFAULT_SUMMARY_INTERVAL = 10.0  # Seconds between console summaries of routine polling.
+DEFAULT_TREND_CAPACITY = 36000  # Samples kept per trended series, an hour at 10 polls a second.
+DEFAULT_TREND_SPAN = 60.0  # Seconds of history shown by the trend plot until it is zoomed.
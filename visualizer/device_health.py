@@ -0,0 +1,72 @@
+import time
+
+ONLINE = "online"  # Polled normally.
+BACKOFF = "backoff"  # Recently failed. Retried after an exponentially growing delay.
+OFFLINE = "offline"  # Circuit open. Only probed with a cheap request every `probe_interval` seconds.
+PROBING = "probing"  # Circuit half open. The next request is a probe that decides between ONLINE and OFFLINE.
+
+
+class DeviceHealth:
+    """
+    Tracks the health of one device (one unit ID on a serial bus, or one TCP endpoint) so a dead device doesn't cost a
+    full timeout on every poll cycle. Failures back off exponentially, and after `failure_threshold` consecutive
+    failures the circuit opens and the device is only probed occasionally until it answers again.
+    """
+    def __init__(self, base_backoff=0.5, max_backoff=30.0, failure_threshold=3, probe_interval=10.0,
+                 clock=time.monotonic):
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.clock = clock
+
+        self.state = ONLINE
+        self.consecutive_failures = 0
+        self.next_attempt = 0.0
+
+    def should_poll(self):
+        """
+        :return: True if the device should be polled now. An open circuit that is due for a probe moves to PROBING.
+        """
+        if self.state in (ONLINE, PROBING):
+            return True
+
+        if self.clock() < self.next_attempt:
+            return False
+
+        if self.state == OFFLINE:
+            self.state = PROBING
+        return True
+
+    def time_until_next_attempt(self):
+        return max(0.0, self.next_attempt - self.clock())
+
+    @property
+    def probing(self):
+        return self.state == PROBING
+
+    def record_success(self):
+        """
+        :return: True if the state changed.
+        """
+        changed = self.state != ONLINE
+        self.state = ONLINE
+        self.consecutive_failures = 0
+        return changed
+
+    def record_failure(self):
+        """
+        :return: True if the state changed.
+        """
+        previous = OFFLINE if self.state == PROBING else self.state  # A failed probe leaves the device offline.
+        self.consecutive_failures += 1
+
+        if self.consecutive_failures >= self.failure_threshold:
+            self.state = OFFLINE
+            self.next_attempt = self.clock() + self.probe_interval
+        else:
+            self.state = BACKOFF
+            backoff = self.base_backoff * 2 ** (self.consecutive_failures - 1)
+            self.next_attempt = self.clock() + min(self.max_backoff, backoff)
+
+        return self.state != previous
@@ -403,7 +403,7 @@ class Ui_MainWindow(object):
         self.gridLayout_6.addWidget(self.tcpPortLineEdit, 1, 1, 1, 1)
         self.gridLayout_5.addWidget(self.tcpSettingsGroupBox, 2, 1, 1, 1)
         self.gridLayout_3.addWidget(self.networkSettingsGroupBox, 0, 0, 1, 2, QtCore.Qt.AlignLeft)
-        self.pollTable = QtWidgets.QTableWidget(self.mainFrame)
+        self.pollTable = QtWidgets.QTableView(self.mainFrame)
         self.pollTable.setEnabled(True)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Minimum)
         sizePolicy.setHorizontalStretch(0)
@@ -418,49 +418,8 @@ class Ui_MainWindow(object):
         self.pollTable.setSizeAdjustPolicy(QtWidgets.QAbstractScrollArea.AdjustToContents)
         self.pollTable.setShowGrid(True)
         self.pollTable.setGridStyle(QtCore.Qt.SolidLine)
-        self.pollTable.setColumnCount(10)
+        self.pollTable.setSortingEnabled(False)
         self.pollTable.setObjectName("pollTable")
-        self.pollTable.setRowCount(10)
-        item = QtWidgets.QTableWidgetItem()
-        self.pollTable.setVerticalHeaderItem(0, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.pollTable.setVerticalHeaderItem(1, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.pollTable.setVerticalHeaderItem(2, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.pollTable.setVerticalHeaderItem(3, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.pollTable.setVerticalHeaderItem(4, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.pollTable.setVerticalHeaderItem(5, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.pollTable.setVerticalHeaderItem(6, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.pollTable.setVerticalHeaderItem(7, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.pollTable.setVerticalHeaderItem(8, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.pollTable.setVerticalHeaderItem(9, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.pollTable.setHorizontalHeaderItem(0, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.pollTable.setHorizontalHeaderItem(1, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.pollTable.setHorizontalHeaderItem(2, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.pollTable.setHorizontalHeaderItem(3, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.pollTable.setHorizontalHeaderItem(4, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.pollTable.setHorizontalHeaderItem(5, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.pollTable.setHorizontalHeaderItem(6, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.pollTable.setHorizontalHeaderItem(7, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.pollTable.setHorizontalHeaderItem(8, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.pollTable.setHorizontalHeaderItem(9, item)
         self.pollTable.horizontalHeader().setVisible(True)
         self.pollTable.horizontalHeader().setCascadingSectionResizes(False)
         self.pollTable.verticalHeader().setSortIndicatorShown(False)
@@ -567,47 +526,6 @@ class Ui_MainWindow(object):
         self.tcpPortLabel.setText(_translate("MainWindow", "Port"))
         self.tcpHostLineEdit.setText(_translate("MainWindow", "127.0.0.1"))
         self.tcpPortLineEdit.setText(_translate("MainWindow", "502"))
-        self.pollTable.setSortingEnabled(False)
-        item = self.pollTable.verticalHeaderItem(0)
-        item.setText(_translate("MainWindow", "+0"))
-        item = self.pollTable.verticalHeaderItem(1)
-        item.setText(_translate("MainWindow", "+1"))
-        item = self.pollTable.verticalHeaderItem(2)
-        item.setText(_translate("MainWindow", "+2"))
-        item = self.pollTable.verticalHeaderItem(3)
-        item.setText(_translate("MainWindow", "+3"))
-        item = self.pollTable.verticalHeaderItem(4)
-        item.setText(_translate("MainWindow", "+4"))
-        item = self.pollTable.verticalHeaderItem(5)
-        item.setText(_translate("MainWindow", "+5"))
-        item = self.pollTable.verticalHeaderItem(6)
-        item.setText(_translate("MainWindow", "+6"))
-        item = self.pollTable.verticalHeaderItem(7)
-        item.setText(_translate("MainWindow", "+7"))
-        item = self.pollTable.verticalHeaderItem(8)
-        item.setText(_translate("MainWindow", "+8"))
-        item = self.pollTable.verticalHeaderItem(9)
-        item.setText(_translate("MainWindow", "+9"))
-        item = self.pollTable.horizontalHeaderItem(0)
-        item.setText(_translate("MainWindow", "1"))
-        item = self.pollTable.horizontalHeaderItem(1)
-        item.setText(_translate("MainWindow", "2"))
-        item = self.pollTable.horizontalHeaderItem(2)
-        item.setText(_translate("MainWindow", "3"))
-        item = self.pollTable.horizontalHeaderItem(3)
-        item.setText(_translate("MainWindow", "4"))
-        item = self.pollTable.horizontalHeaderItem(4)
-        item.setText(_translate("MainWindow", "5"))
-        item = self.pollTable.horizontalHeaderItem(5)
-        item.setText(_translate("MainWindow", "6"))
-        item = self.pollTable.horizontalHeaderItem(6)
-        item.setText(_translate("MainWindow", "7"))
-        item = self.pollTable.horizontalHeaderItem(7)
-        item.setText(_translate("MainWindow", "8"))
-        item = self.pollTable.horizontalHeaderItem(8)
-        item.setText(_translate("MainWindow", "9"))
-        item = self.pollTable.horizontalHeaderItem(9)
-        item.setText(_translate("MainWindow", "10"))
         self.menuFile.setTitle(_translate("MainWindow", "File"))
         self.actionExit.setText(_translate("MainWindow", "Exit"))
 
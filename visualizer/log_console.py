@@ -0,0 +1,73 @@
+from collections import deque
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSlot
+from PyQt5.QtGui import QTextCursor
+
+from visualizer.constants import LOG_INFO
+
+
+class LogConsole(QObject):
+    """
+    Numbered log messages shown in a QTextEdit. Messages are kept in a bounded ring buffer and appended to the document
+    in batches on a timer. The document drops its oldest lines itself once `max_lines` is reached, so each message
+    costs the same however full the console is. Messages below `level` are kept in the buffer but not shown, so
+    lowering the level brings them back.
+    """
+    def __init__(self, text_edit, max_lines=500, flush_interval=100, level=LOG_INFO, parent=None):
+        """
+        :param flush_interval: Milliseconds between batched appends to the document.
+        """
+        super().__init__(parent)
+        self.text_edit = text_edit
+        self.max_lines = max_lines
+        self.level = level
+        self.message_number = 0
+        self.lines = deque(maxlen=max_lines)  # (level, line) of the latest messages, shown or not
+        self.pending = []  # Lines waiting for the next flush
+
+        self.text_edit.document().setMaximumBlockCount(max_lines + 1)  # +1 for the empty first line.
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(flush_interval)
+        self.timer.timeout.connect(self.flush)
+
+    def write(self, msg, level=LOG_INFO):
+        """
+        :param level: One of the `LOG_` levels in `constants`.
+        """
+        line = f"({self.message_number}): {msg}"
+        self.message_number += 1
+        self.lines.append((level, line))
+
+        if level >= self.level:
+            self.pending.append(line)
+            if not self.timer.isActive():
+                self.timer.start()
+
+    @pyqtSlot()
+    def flush(self):
+        if not self.pending:
+            return
+
+        text = "\n" + "\n".join(self.pending[-self.max_lines:])
+        self.pending = []
+
+        scroll_bar = self.text_edit.verticalScrollBar()
+        at_bottom = scroll_bar.value() >= scroll_bar.maximum()
+
+        cursor = QTextCursor(self.text_edit.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text)
+
+        if at_bottom:
+            scroll_bar.setValue(scroll_bar.maximum())  # Auto scroll, unless the user scrolled up to read.
+
+    def set_level(self, level):
+        """
+        Show only messages at or above `level`, including ones already in the buffer.
+        """
+        self.level = level
+        self.text_edit.setPlainText("")
+        self.pending = [line for line_level, line in self.lines if line_level >= level]
+        self.flush()
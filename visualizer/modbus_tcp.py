@@ -0,0 +1,139 @@
+import socket
+import struct
+import sys
+import time
+from array import array
+
+from visualizer.constants import MODBUS_EXCEPTION_CODES
+from visualizer.poll_result import BIT_FUNCTION_CODES, unpack_bits
+
+MBAP_HEADER = struct.Struct(">HHHB")  # Transaction ID, Protocol ID, Length, Unit ID
+READ_REQUEST = struct.Struct(">BHH")  # Function Code, Start Register, Quantity
+
+
+class ModbusExceptionResponse(Exception):
+    def __init__(self, function_code, exception_code):
+        self.function_code = function_code
+        self.exception_code = exception_code
+        msg = MODBUS_EXCEPTION_CODES.get(exception_code, "Unknown Exception")
+        super().__init__(f"Modbus Error Code {exception_code}: {msg}")
+
+
+def encode_read_request(transaction_id, unit_id, function_code, start_register, length):
+    """
+    Build a complete Modbus TCP frame (MBAP header + PDU) for one of the read function codes.
+    """
+    pdu = READ_REQUEST.pack(function_code, start_register, length)
+    return MBAP_HEADER.pack(transaction_id, 0, len(pdu) + 1, unit_id) + pdu
+
+
+def decode_header(header):
+    """
+    :param header: The 7 byte MBAP header of a response.
+    :return: Tuple of (transaction_id, remaining_length) where `remaining_length` is the size of the PDU that follows.
+    """
+    transaction_id, _, length, _ = MBAP_HEADER.unpack(header)
+    return transaction_id, length - 1  # The unit ID byte is counted in the length field but is part of the header.
+
+
+def decode_read_response(pdu, length):
+    """
+    Convert the PDU of a read response into register or bit values.
+
+    :param pdu: Response PDU, starting with the function code.
+    :param length: Number of registers or bits that were requested.
+    :raises ModbusExceptionResponse: When the device answered with an exception.
+    :return: `array('H')` of registers for register reads, or list of bools for coil/discrete input reads.
+    """
+    function_code = pdu[0]
+    if function_code & 0x80:
+        raise ModbusExceptionResponse(function_code & 0x7F, pdu[1])
+
+    byte_count = pdu[1]
+    payload = pdu[2:2 + byte_count]
+
+    if function_code in BIT_FUNCTION_CODES:
+        return unpack_bits(payload, length)
+
+    registers = array('H', payload[:byte_count // 2 * 2])  # Copied straight from the payload, no boxed ints.
+    if sys.byteorder == "little":
+        registers.byteswap()
+    return registers
+
+
+class PipelinedTransport:
+    """
+    Issues many read requests on one connected Modbus TCP socket with up to `window` transactions in flight, matching
+    the responses back to their requests by transaction ID. Replies may arrive in any order.
+    """
+    def __init__(self, sock, window=4, timeout=3.0):
+        self.sock = sock
+        self.window = max(1, window)
+        self.timeout = timeout
+        self.transaction_id = 0
+
+    def next_transaction_id(self):
+        self.transaction_id = (self.transaction_id + 1) & 0xFFFF
+        return self.transaction_id
+
+    def read_many(self, reads):
+        """
+        :param reads: List of dicts with "function_code", "start_register", "length" and "unit_id".
+        :raises OSError: When the connection fails. The socket should not be reused afterwards.
+        :return: List with, for each read, the decoded data or the exception it failed with (`ModbusExceptionResponse`
+            or `TimeoutError`).
+        """
+        results = [None] * len(reads)
+        pending = {}  # transaction id -> (index of read, deadline)
+        buffer = bytearray()
+        next_index = 0
+        original_timeout = self.sock.gettimeout()
+
+        try:
+            while next_index < len(reads) or pending:
+                while next_index < len(reads) and len(pending) < self.window:
+                    r = reads[next_index]
+                    transaction_id = self.next_transaction_id()
+                    self.sock.sendall(encode_read_request(transaction_id, r["unit_id"], r["function_code"],
+                                                          r["start_register"], r["length"]))
+                    pending[transaction_id] = (next_index, time.monotonic() + self.timeout)
+                    next_index += 1
+
+                now = time.monotonic()
+                for transaction_id, (index, deadline) in list(pending.items()):
+                    if deadline <= now:
+                        del pending[transaction_id]
+                        results[index] = TimeoutError(f"No response to transaction {transaction_id}")
+                if not pending:
+                    continue
+
+                self.sock.settimeout(min(deadline for _, deadline in pending.values()) - now)
+                try:
+                    received = self.sock.recv(4096)
+                except socket.timeout:
+                    continue
+                if not received:
+                    raise ConnectionResetError("Connection closed by device")
+
+                buffer.extend(received)
+                while len(buffer) >= MBAP_HEADER.size:
+                    transaction_id, pdu_length = decode_header(bytes(buffer[:MBAP_HEADER.size]))
+                    frame_length = MBAP_HEADER.size + pdu_length
+                    if len(buffer) < frame_length:
+                        break
+
+                    pdu = bytes(buffer[MBAP_HEADER.size:frame_length])
+                    del buffer[:frame_length]
+
+                    if transaction_id not in pending:
+                        continue  # Late reply to a transaction that already timed out.
+
+                    index, _ = pending.pop(transaction_id)
+                    try:
+                        results[index] = decode_read_response(pdu, reads[index]["length"])
+                    except ModbusExceptionResponse as e:
+                        results[index] = e
+        finally:
+            self.sock.settimeout(original_timeout)
+
+        return results
@@ -1,98 +1,174 @@
+import struct
+import threading
 import time
 from queue import Queue, Empty
 from pymodbus.client.sync import ModbusTcpClient, ModbusSerialClient
 from pymodbus.pdu import ExceptionResponse
 from pymodbus.exceptions import ConnectionException, ModbusIOException, ModbusException
 from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
-from visualizer.constants import MODBUS_EXCEPTION_CODES
-
-
-def busy_work_reject(func):
-    def wrapper(self, *args, **kwargs):
-        if self.busy:
-            return
-        else:
-            self.busy = True
-            func(self, *args, **kwargs)
-            self.busy = False
-
-    return wrapper
+from visualizer.connection_pool import ConnectionPool
+from visualizer.device_health import DeviceHealth, ONLINE
+from visualizer.constants import MODBUS_EXCEPTION_CODES, DEFAULT_GAP_FILL, MAX_READ_LENGTH, DEFAULT_PIPELINE_WINDOW, \
+    LOG_DEBUG, LOG_INFO, LOG_WARNING, LOG_ERROR
+from visualizer.modbus_tcp import PipelinedTransport, ModbusExceptionResponse
+from visualizer.poll_log import PollLog
+from visualizer.poll_result import PollResult
+from visualizer.scan_planner import plan_reads, fan_out, split_read
+from visualizer.scheduler import DeadlineScheduler, MultiRateScheduler, SKIP
+from visualizer.write_coalescer import coalesce_writes
 
 
 class ModbusWorker(QObject):
-    data_available = pyqtSignal(list)
+    """
+    Owns the Modbus client and does all bus I/O on the worker thread. Other threads never touch the client, they put
+    commands on `commands` through the public methods below and `run` executes them in order.
+    """
+    data_available = pyqtSignal(object)  # PollResult of the polled block.
+    scan_data_available = pyqtSignal(list)  # One list of data per scan list block, None where the read failed.
     new_connection_available = pyqtSignal()
-    console_message_available = pyqtSignal(str)
+    console_message_available = pyqtSignal(str, int)  # Message, one of the `LOG_` levels in `constants`.
     polling_started = pyqtSignal()
     polling_finished = pyqtSignal()
     write_queue_empty = pyqtSignal()
+    schedule_stats_available = pyqtSignal(dict)
+    device_health_changed = pyqtSignal(int, str)  # Unit ID, one of the `device_health` states.
 
     def __init__(self):
         super().__init__()
 
         self.client = None
-        self.busy = False
+        self.client_ready = threading.Event()  # Set while a configured client is available.
+        self.pool = ConnectionPool(self.create_client)  # Warm connections to recently used endpoints.
+        self.pipeline_window = DEFAULT_PIPELINE_WINDOW
+        self.device_health = {}  # unit id -> DeviceHealth, reset whenever the client is reconfigured.
+        self.poll_log = PollLog()  # Keeps routine polling and repeated errors from flooding the console.
 
-        self.poll_requests = Queue(maxsize=1)  # queue for incoming poll requests. limit to one poll at a time.
+        self.commands = Queue()  # (command, argument) tuples for the worker thread, see `run`.
         self.write_requests = Queue()
-        self.stop_polling = False  # Flag signal to stop polling.
+        self.polling = False
+        self.stop_polling = False  # Set by a "stop" command, checked by the poll loop.
 
-    def is_busy(self):
-        return self.busy
+    def is_polling(self):
+        return self.polling
 
-    @pyqtSlot(dict)
-    @busy_work_reject
     def configure_client(self, settings):
-        if self.client:
-            self.client.close()  # Properly close the client when re-configuring. Needed for Serial.
+        self.client_ready.clear()
+        self.commands.put(("configure", settings))
+
+    def submit_poll(self, request):
+        self.commands.put(("poll", request))
+
+    def queue_write(self, request):
+        self.write_requests.put(request)
+        if self.polling:
+            self.commands.put(("write", None))  # Written between polls. Otherwise it waits for `request_write`.
+
+    def request_write(self):
+        self.commands.put(("write", None))
+
+    def request_stop(self):
+        self.commands.put(("stop", None))
+
+    def shutdown(self):
+        self.commands.put(("shutdown", None))
+
+    @pyqtSlot()
+    def run(self):
+        """
+        Command loop of the worker thread. Blocks on the command queue until `shutdown` is requested.
+        """
+        while True:
+            try:
+                command, argument = self.commands.get(timeout=self.pool.idle_timeout)
+            except Empty:
+                self.pool.evict_idle()
+                continue
+
+            if command == "shutdown":
+                break
+            elif command == "configure":
+                self.apply_client_settings(argument)
+            elif command == "poll":
+                self.act_on_poll_request(argument)
+            elif command == "write":
+                self.write_all_requests()
+            # A "stop" outside of polling has nothing to stop.
+
+        self.pool.close_all()
+
+    def handle_command_while_polling(self, command, argument):
+        """
+        Execute a command received between polls.
+
+        :return: False if polling should end.
+        """
+        if command == "configure":
+            self.apply_client_settings(argument)
+        elif command == "write":
+            self.write_all_requests()
+        elif command == "poll":
+            self.console_message_available.emit("Already polling.", LOG_WARNING)
+        elif command == "stop":
+            return False
+        elif command == "shutdown":
+            self.commands.put((command, argument))  # Leave it for `run` once polling has wound down.
+            return False
+
+        return True
+
+    def apply_client_settings(self, settings):
+        self.client, reused = self.pool.acquire(settings)
+        self.device_health = {}
+
+        if self.client is None:
+            self.client_ready.clear()
+            return
 
-        if settings["network_type"] is "tcp":
+        self.client_ready.set()
+
+        if reused:
+            self.console_message_available.emit("Reusing open connection.", LOG_INFO)
+        elif self.pool.is_healthy(self.client):
+            self.console_message_available.emit("Connection Successful", LOG_INFO)
+        else:
+            self.console_message_available.emit("Connection Failed", LOG_ERROR)
+
+    def create_client(self, settings):
+        if settings["network_type"] == "tcp":
             host = settings["host"]
             port = settings["port"]
-            self.client = ModbusTcpClient(host, port)
-            self.console_message_available.emit(f"Attempting to connect to {host} on port {port}")
+            self.console_message_available.emit(f"Attempting to connect to {host} on port {port}", LOG_INFO)
+            return ModbusTcpClient(host, port)
 
-        elif settings["network_type"] is "serial":
+        elif settings["network_type"] == "serial":
             port = settings["port"]
             protocol = settings["protocol"]
             baudrate = settings["baudrate"]
             stop_bits = settings["stop_bits"]
             byte_size = settings["byte_size"]
             parity = settings["parity"]
-            self.client = ModbusSerialClient(method=protocol,
-                                             port=port,
-                                             baudrate=baudrate,
-                                             stopbits=stop_bits,
-                                             bytesize=byte_size,
-                                             parity=parity)
-            self.console_message_available.emit(f"Attempting to connect to on port {port}")
-
-        else:
-            self.console_message_available.emit("Unknown Network Type")
-
-        connected = self.client.connect()
-
-        if connected:
-            self.console_message_available.emit("Connection Successful")
-        else:
-            self.console_message_available.emit("Connection Failed")
+            self.console_message_available.emit(f"Attempting to connect to on port {port}", LOG_INFO)
+            return ModbusSerialClient(method=protocol,
+                                      port=port,
+                                      baudrate=baudrate,
+                                      stopbits=stop_bits,
+                                      bytesize=byte_size,
+                                      parity=parity)
+
+        self.console_message_available.emit("Unknown Network Type", LOG_ERROR)
+        return None
+
+    def act_on_poll_request(self, req):
+        if not self.client_ready.is_set():
+            self.console_message_available.emit("No client configured.", LOG_WARNING)
+            return
 
-    @pyqtSlot()
-    def act_on_poll_request(self):
+        self.polling = True
+        self.stop_polling = False
         self.polling_started.emit()
 
         self.write_all_requests()  # Clear write Queue before reading.
 
-        try:
-            req = self.poll_requests.get(timeout=1)  # Get the request out of the queue.
-        except Empty:
-            print("No request was found. This should never happen.")
-            self.polling_finished.emit()
-            return
-
-        while self.busy:
-            pass  # Wait for client to be configured if necessary
-
         try:
             function_code = req.get("function_code")
             start_register = req.get("start_register")
@@ -100,46 +176,186 @@ class ModbusWorker(QObject):
             poll_interval = req.get("interval", 0)
             poll_duration = req.get("duration", 0)
             unit_id = req.get("unit_id", 255)
+            blocks = req.get("blocks")  # Scan list mode when present.
+            gap_fill = req.get("gap_fill", DEFAULT_GAP_FILL)
+            overrun_policy = req.get("overrun_policy", SKIP)
+            self.pipeline_window = req.get("pipeline_window", DEFAULT_PIPELINE_WINDOW)
             # poll_sample_count = options.get("sample_count", None)  # TODO: Implement something like this.
         except KeyError:
-            self.console_message_available.emit(f"Request badly formatted: {req}")
+            self.console_message_available.emit(f"Request badly formatted: {req}", LOG_ERROR)
+            self.polling = False
             self.polling_finished.emit()
             return
 
-        timer = time.time()
-        successful = 1
-        retries = 0
+        self.poll_log.reset()
+        timer = time.monotonic()
+        if blocks:
+            # Scan lists may give each block its own interval. Blocks due together are coalesced into shared reads.
+            scheduler = MultiRateScheduler([b.get("interval", poll_interval) for b in blocks],
+                                           overrun_policy=overrun_policy)
+            block_data = [None] * len(blocks)  # Latest data of every block, polled this cycle or not.
+            plans = {}  # Due block indices -> (due blocks, reads planned for them)
+        else:
+            scheduler = DeadlineScheduler(poll_interval, overrun_policy=overrun_policy)
+
+        force = not poll_duration  # A single poll was asked for explicitly, so it goes out whatever the device health.
         poll_time_exceeded = False
         while not poll_time_exceeded and not self.stop_polling:
-            start = time.time()
-
-            data = self.get_modbus_data(function_code, start_register, length, unit_id=unit_id)
-            self.data_available.emit(data)
-
-            if data:
-                retries = 0
-                self.console_message_available.emit(f"Poll {successful} complete.")
-                successful += 1
+            due = scheduler.tick()
+            poll_start = time.monotonic()
+
+            if blocks:
+                polled = self.get_due_block_data(blocks, due, plans, gap_fill, unit_id, force=force)
+                for i, d in polled.items():
+                    block_data[i] = d
+                if polled:
+                    self.scan_data_available.emit(list(block_data))
+                success = all(d is not None for d in polled.values()) if polled else None
+            elif self.check_device(unit_id, function_code, start_register, force=force):
+                data, failed = self.get_modbus_data(function_code, start_register, length, unit_id=unit_id)
+                self.record_device_result(unit_id, data is not None)  # Exception replies still show it is alive.
+                self.data_available.emit(PollResult(function_code, start_register, data or [], unit_id=unit_id,
+                                                    failed=failed))
+                success = bool(data) and not failed
             else:
-                successful = 0  # Reset successful counter?
-                self.console_message_available.emit(f"Poll Failed. Retrying... {retries}")
-                retries += 1
-
-            while time.time() - start < poll_interval:  # Elapsed Time < Interval
-                self.write_all_requests()  # Write any requests that came in while polling.
-
-                if self.stop_polling:
+                success = None  # Device is backing off or offline.
+
+            if success is not None:
+                # Otherwise nothing was due, or everything due belongs to devices that are backing off.
+                self.emit_messages(self.poll_log.record_poll(success, time.monotonic() - poll_start))
+            self.emit_messages(self.poll_log.due())
+
+            # Block on the command queue until the next deadline, handling writes, stops and reconfiguration as they
+            # arrive.
+            while not self.stop_polling:
+                try:
+                    command, argument = self.commands.get(timeout=scheduler.time_until_next())
+                except Empty:
                     break
+                self.stop_polling = not self.handle_command_while_polling(command, argument)
 
-                time.sleep(0.01)  # Do we need this much accuracy on poll interval? Does it hurt?
-
-            poll_time_exceeded = time.time() - timer >= poll_duration
+            poll_time_exceeded = time.monotonic() - timer >= poll_duration
 
-        self.polling_finished.emit()
+        self.polling = False
         self.stop_polling = False
-        self.console_message_available.emit("Polling Stopped.")
+        self.polling_finished.emit()
+        self.emit_messages(self.poll_log.summarize())
+        self.console_message_available.emit("Polling Stopped.", LOG_INFO)
+
+        stats = scheduler.stats()
+        self.schedule_stats_available.emit(stats)
+        if stats["cycles"] > 1:
+            self.console_message_available.emit(f"Achieved period {stats['mean_period'] * 1000:.1f} ms, "
+                                                f"jitter {stats['jitter'] * 1000:.2f} ms, "
+                                                f"{stats['overruns']} overruns, {stats['skipped']} cycles skipped.",
+                                                LOG_INFO)
+
+    def emit_messages(self, messages):
+        for msg, level in messages:
+            self.console_message_available.emit(msg, level)
+
+    def report_error(self, msg, key=None, level=LOG_ERROR):
+        """
+        Report an error on the console unless it was already reported in this summary interval, in which case it is
+        only counted for the summary.
+
+        :param key: Identifies repeats of the error, see `PollLog.error`.
+        """
+        self.emit_messages(self.poll_log.due())  # Outside of polling nothing else ends the interval.
+        self.emit_messages(self.poll_log.error(msg, key, level))
 
     def get_modbus_data(self, function_code, start_reg, length, unit_id=255):
+        """
+        Read `length` registers or bits starting at `start_reg`. Reads longer than a single request allows are split
+        into chunks transparently, and the chunks that succeeded are kept when others fail.
+
+        :return: Tuple of (data, failed_chunks), see `get_chunked_modbus_data`. A read that fits in a single request
+            either fails as a whole, with `data` as returned by `read_block`, or has no failed chunks.
+        """
+        if length > MAX_READ_LENGTH.get(function_code, length):
+            return self.get_chunked_modbus_data(function_code, start_reg, length, unit_id=unit_id)
+
+        return self.read_block(function_code, start_reg, length, unit_id=unit_id), []
+
+    def get_chunked_modbus_data(self, function_code, start_reg, length, unit_id=255):
+        """
+        Read any span of the address space as protocol-legal chunks issued back to back on the current connection.
+
+        :return: Tuple of (data, failed_chunks). `data` is one contiguous list of `length` values with zeros in place of
+            values from chunks that failed, an empty list if every chunk failed, or `None` if the device answered none
+            of the chunks. `failed_chunks` is a list of the (start_register, length) of each failed chunk.
+        """
+        if start_reg + length > 65536:
+            self.report_error(f"Read of {length} from {start_reg} exceeds the address space.")
+            return [], [(start_reg, length)]
+
+        chunks = [{"function_code": function_code, "start_register": chunk_start, "length": chunk_length,
+                   "unit_id": unit_id} for chunk_start, chunk_length in split_read(function_code, start_reg, length)]
+
+        data = []
+        failed_chunks = []
+        answered = False
+        for chunk, chunk_data in zip(chunks, self.read_many(chunks)):
+            answered = answered or chunk_data is not None
+            if chunk_data:
+                data.extend(chunk_data)
+            else:
+                chunk_start = chunk["start_register"]
+                chunk_length = chunk["length"]
+                failed_chunks.append((chunk_start, chunk_length))
+                data.extend([0] * chunk_length)
+                self.report_error(f"Chunk {chunk_start}-{chunk_start + chunk_length - 1} failed.")
+
+        if len(failed_chunks) == len(chunks):
+            data = []
+        return (data if answered else None), failed_chunks
+
+    def read_many(self, reads):
+        """
+        Issue several single-request reads. Over Modbus TCP they are pipelined with up to `pipeline_window` in flight,
+        otherwise they are issued one after another.
+
+        :param reads: List of dicts with "function_code", "start_register", "length" and "unit_id".
+        :return: List of the data of each read, as returned by `read_block`.
+        """
+        if len(reads) < 2 or self.pipeline_window < 2 or not isinstance(self.client, ModbusTcpClient) \
+                or not (self.client.socket or self.client.connect()):
+            return [self.read_block(r["function_code"], r["start_register"], r["length"], unit_id=r["unit_id"])
+                    for r in reads]
+
+        transport = PipelinedTransport(self.client.socket, window=self.pipeline_window, timeout=self.client.timeout)
+        try:
+            results = transport.read_many(reads)
+        except OSError:
+            self.client.close()  # pymodbus reconnects on the next request.
+            self.report_error("Connection Failed.")
+            return [None for _ in reads]
+        except (struct.error, ValueError, IndexError) as e:
+            self.client.close()  # The rest of the stream can't be framed reliably after a malformed reply.
+            self.report_error(f"Malformed response: {e}")
+            return [None for _ in reads]
+
+        data = []
+        for result in results:
+            if isinstance(result, ModbusExceptionResponse):
+                self.report_error(str(result))
+                data.append([])
+            elif isinstance(result, TimeoutError):
+                # Drop the connection so a late reply can't be mistaken for the answer to a later request.
+                self.client.close()
+                self.report_error(str(result))
+                data.append(None)
+            else:
+                data.append(result)
+
+        return data
+
+    def read_block(self, function_code, start_reg, length, unit_id=255):
+        """
+        :return: The data read. An empty list if the device answered with a Modbus exception, `None` if it didn't
+            answer or the reply couldn't be used, so callers can tell a live device refusing a read from one that is
+            unreachable.
+        """
         modbus_functions = {0x01: self.client.read_coils,
                             0x02: self.client.read_discrete_inputs,
                             0x04: self.client.read_input_registers,
@@ -149,23 +365,26 @@ class ModbusWorker(QObject):
             rr = modbus_functions[function_code](start_reg, length, unit=unit_id)
 
         except KeyError:
-            self.console_message_available.emit(f"Function code not supported: {function_code}")
-            return []
+            self.report_error(f"Function code not supported: {function_code}")
+            return None
         except ConnectionException:
-            self.console_message_available.emit("Connection Failed.")
-            return []
+            self.report_error("Connection Failed.")
+            return None
+        except (struct.error, ValueError) as e:
+            self.report_error(f"Malformed response: {e}")
+            return None
 
         # This works for TCP Exceptions
         if isinstance(rr, ExceptionResponse):
             code = rr.exception_code
             msg = MODBUS_EXCEPTION_CODES[code]
-            self.console_message_available.emit(f"Modbus Error Code {code}: {msg}")
+            self.report_error(f"Modbus Error Code {code}: {msg}")
             return []
 
         # This works for Serial Exceptions
         elif isinstance(rr, ModbusException):
-            self.console_message_available.emit(f"{str(rr)}")
-            return []
+            self.report_error(f"{str(rr)}")
+            return None
 
         else:  # Response is ModbusResponse
             try:
@@ -175,6 +394,115 @@ class ModbusWorker(QObject):
 
         return data
 
+    def get_due_block_data(self, blocks, due, plans, gap_fill, unit_id, force=False):
+        """
+        Poll the scan list blocks that are due this cycle. Plans are cached per set of due blocks, so each combination
+        is only coalesced once per polling session.
+
+        :param due: Indices of the due blocks, fastest rate first.
+        :param plans: Cache of plans for this polling session.
+        :param force: Poll every due block whatever the health of its device, see `check_device`.
+        :return: dict of block index -> data, `None` for blocks whose read failed.
+        """
+        unit_of = {i: blocks[i].get("unit_id", unit_id) for i in due}
+
+        # Leave out devices that are backing off. Offline devices due for a probe get a cheap read of their first block.
+        available_units = set()
+        for i in due:
+            unit = unit_of[i]
+            if unit not in available_units and self.check_device(unit, blocks[i]["function_code"],
+                                                                 blocks[i]["start_register"], force=force):
+                available_units.add(unit)
+        due = [i for i in due if unit_of[i] in available_units]
+
+        if not due:
+            return {}
+
+        key = tuple(due)
+        if key not in plans:
+            due_blocks = [blocks[i] for i in due]
+            reads = plan_reads(due_blocks, gap_fill=gap_fill, unit_id=unit_id)
+            reads.sort(key=lambda r: min(r["blocks"]))  # Reads holding the fastest blocks go first.
+            plans[key] = (due_blocks, reads)
+            self.console_message_available.emit(f"Scan list of {len(due_blocks)} blocks planned as {len(reads)} reads.",
+                                                LOG_DEBUG)
+
+        due_blocks, reads = plans[key]
+        block_data, answered_units = self.get_scan_list_data(due_blocks, reads)
+        polled = dict(zip(due, block_data))
+
+        for unit in available_units:
+            self.record_device_result(unit, unit in answered_units)
+
+        return polled
+
+    def check_device(self, unit_id, function_code, start_register, force=False):
+        """
+        Decide whether a device should be polled this cycle. An offline device that is due for a probe is sent a single
+        register read, and only polled if it answers. Skipped polls are reported, rate limited by the poll log.
+
+        :param force: Poll the device whatever its health, for polls the user asked for explicitly. The result still
+            counts towards its health.
+        :return: True if the device should be polled.
+        """
+        health = self.device_health.setdefault(unit_id, DeviceHealth())
+        if force:
+            return True
+
+        if not health.should_poll():
+            self.report_error(f"Unit {unit_id} {health.state}, next attempt in "
+                              f"{health.time_until_next_attempt():.1f} s. Poll skipped.",
+                              key=("skipped", unit_id, health.state), level=LOG_WARNING)
+            return False
+
+        if health.probing:
+            answered = self.read_block(function_code, start_register, 1, unit_id=unit_id) is not None
+            self.record_device_result(unit_id, answered)
+            return answered
+
+        return True
+
+    def record_device_result(self, unit_id, success):
+        health = self.device_health.setdefault(unit_id, DeviceHealth())
+        changed = health.record_success() if success else health.record_failure()
+
+        if changed:
+            self.device_health_changed.emit(unit_id, health.state)
+            self.console_message_available.emit(f"Unit {unit_id} health: {health.state}.",
+                                                LOG_INFO if health.state == ONLINE else LOG_WARNING)
+
+    def get_scan_list_data(self, blocks, reads):
+        """
+        Issue each planned read of a scan list and split the results back out per block.
+
+        :param blocks: The scan list blocks.
+        :param reads: The reads planned for `blocks` by `plan_reads`.
+        :return: Tuple of (block_data, answered_units). `block_data` is a list of data per block, `None` for blocks
+            whose read failed. `answered_units` is the set of unit IDs that answered at least one read, with data or
+            with a Modbus exception.
+        """
+        chunks = []
+        chunk_counts = []
+        for r in reads:
+            pieces = split_read(r["function_code"], r["start_register"], r["length"])
+            chunk_counts.append(len(pieces))
+            chunks.extend({"function_code": r["function_code"], "start_register": chunk_start, "length": chunk_length,
+                           "unit_id": r["unit_id"]} for chunk_start, chunk_length in pieces)
+        chunk_data = self.read_many(chunks)
+
+        # Reassemble the chunks of each read. A read is only usable if every one of its chunks succeeded.
+        results = []
+        answered_units = set()
+        position = 0
+        for r, count in zip(reads, chunk_counts):
+            pieces = chunk_data[position:position + count]
+            position += count
+            results.append([value for piece in pieces for value in piece] if all(pieces) else [])
+            if any(piece is not None for piece in pieces):
+                answered_units.add(r["unit_id"])
+
+        return fan_out(blocks, reads, results), answered_units
+
     def write_modbus_data(self, function_code, start_reg, values):
         modbus_functions = {0x15: self.client.write_coils,
                             0x16: self.client.write_registers}
@@ -182,21 +510,26 @@ class ModbusWorker(QObject):
         modbus_functions[function_code](start_reg, values)
 
         registers = [start_reg + i for i in range(len(values))]
-        self.console_message_available.emit(f"Wrote registers {registers}")
+        self.console_message_available.emit(f"Wrote registers {registers}", LOG_INFO)
         return True
 
     def write_all_requests(self):
+        queued = []
         while not self.write_requests.empty():
-            wq = self.write_requests.get()
+            queued.append(self.write_requests.get())
+
+        writes = coalesce_writes(queued)
+        if len(writes) < len(queued):
+            self.console_message_available.emit(f"Coalesced {len(queued)} write requests into {len(writes)} writes.",
+                                                LOG_DEBUG)
+
+        for wq in writes:
             self.write_modbus_data(wq["function_code"], wq["start_register"], wq["values"])
 
         self.write_queue_empty.emit()
 
     def clear_write_queue(self):
-        self.console_message_available.emit("Clearing write queue...")
+        self.console_message_available.emit("Clearing write queue...", LOG_INFO)
         while not self.write_requests.empty():
             self.write_requests.get()
 
-    def shutdown(self):
-        if self.client:
-            self.client.close()
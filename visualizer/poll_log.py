@@ -0,0 +1,98 @@
+import time
+
+from visualizer.constants import DEFAULT_SUMMARY_INTERVAL, LOG_INFO, LOG_WARNING, LOG_ERROR
+
+
+class PollLog:
+    """
+    Aggregates the console output of the poll loop. Routine polls are only counted and reported as a periodic summary,
+    an error is reported the first time it occurs in each summary interval and its repeats are counted, and the switch
+    between polls succeeding and failing is reported as it happens. The console gets a few lines per interval however
+    fast the loop polls.
+
+    Methods return the messages to show now, possibly none, as (message, level) tuples.
+    """
+    def __init__(self, interval=DEFAULT_SUMMARY_INTERVAL, clock=time.monotonic):
+        """
+        :param interval: Seconds between summaries.
+        """
+        self.interval = interval
+        self.clock = clock
+        self.failing = False
+        self.consecutive_failures = 0
+        self.start_window()
+
+    def start_window(self):
+        self.window_start = self.clock()
+        self.polls = 0
+        self.failures = 0
+        self.poll_time = 0.0
+        self.repeats = {}  # Error key -> [message, level, times repeated since it was reported in this window]
+
+    def reset(self):
+        self.failing = False
+        self.consecutive_failures = 0
+        self.start_window()
+
+    def record_poll(self, success, duration):
+        """
+        :param duration: Seconds the poll took.
+        """
+        self.polls += 1
+        self.poll_time += duration
+
+        if success:
+            messages = []
+            if self.failing:
+                messages.append((f"Polling recovered after {plural(self.consecutive_failures, 'failed poll')}.",
+                                 LOG_INFO))
+            self.failing = False
+            self.consecutive_failures = 0
+            return messages
+
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.failing:
+            return []
+        self.failing = True
+        return [("Poll Failed. Retrying...", LOG_WARNING)]
+
+    def error(self, msg, key=None, level=LOG_ERROR):
+        """
+        :param key: Identifies repeats of the error, `msg` itself if None. Lets messages whose details change, such as
+            a countdown, count as repeats of each other.
+        """
+        key = msg if key is None else key
+        if key in self.repeats:
+            self.repeats[key][2] += 1
+            return []
+        self.repeats[key] = [msg, level, 0]
+        return [(msg, level)]
+
+    def due(self):
+        """
+        :return: The summary if the interval has passed, otherwise nothing.
+        """
+        return self.summarize() if self.clock() - self.window_start >= self.interval else []
+
+    def summarize(self):
+        """
+        Summarize the current window and start a new one.
+        """
+        elapsed = self.clock() - self.window_start
+        messages = []
+        if self.polls:
+            summary = f"{plural(self.polls, 'poll')}, {plural(self.failures, 'failure')}, " \
+                      f"avg {self.poll_time / self.polls * 1000:.0f} ms"
+            messages.append((summary + (f" in the last {elapsed:.0f} s." if elapsed >= 1 else "."), LOG_INFO))
+
+        for msg, level, count in self.repeats.values():
+            if count:
+                messages.append((f"{msg} (repeated {plural(count, 'more time')})", level))
+
+        self.start_window()
+        return messages
+
+
+def plural(count, noun):
+    return f"{count:,} {noun}{'' if count == 1 else 's'}"
@@ -0,0 +1,124 @@
+import time
+from array import array
+
+BIT_FUNCTION_CODES = (0x01, 0x02)  # Reads returning coils/discrete inputs rather than registers.
+
+
+def pack_bits(bits):
+    """
+    Pack a sequence of bools 8 to a byte, least significant bit first, the same layout Modbus uses on the wire.
+    """
+    packed = bytearray((len(bits) + 7) // 8)
+    for i, bit in enumerate(bits):
+        if bit:
+            packed[i >> 3] |= 1 << (i & 7)
+    return bytes(packed)
+
+
+def unpack_bits(packed, length):
+    """
+    Inverse of `pack_bits`.
+
+    :return: List of `length` bools.
+    """
+    return [bool(packed[i >> 3] >> (i & 7) & 1) for i in range(length)]
+
+
+def changed_bits(old, new, length):
+    """
+    Find the bits that toggled between two packed polls of the same block by XORing them as big integers.
+
+    :param old: Previously polled bits, packed by `pack_bits`.
+    :param new: Newly polled bits, packed by `pack_bits`.
+    :param length: Number of bits in `new`.
+    :return: Sorted list of the indices of the toggled bits. Every bit if the polls differ in size.
+    """
+    if len(old) != len(new):
+        return list(range(length))
+
+    diff = int.from_bytes(old, "little") ^ int.from_bytes(new, "little")
+    changed = []
+    while diff:
+        lowest = diff & -diff
+        changed.append(lowest.bit_length() - 1)
+        diff ^= lowest
+    return changed
+
+
+class PollResult:
+    """
+    The data of one polled block, kept in a compact buffer instead of a list of boxed ints so it is cheap to build and
+    to hand from the worker thread to the GUI. Registers are stored as an `array('H')` and bits are packed 8 to a byte.
+    """
+    __slots__ = ("function_code", "start_register", "unit_id", "timestamp", "length", "payload", "failed")
+
+    def __init__(self, function_code, start_register, data, unit_id=255, timestamp=None, failed=()):
+        """
+        :param data: Polled registers (any sequence of ints, an `array('H')` is used as is) or bits (sequence of bools).
+            Empty if the poll failed.
+        :param timestamp: Wall clock time the data was read at. Defaults to now.
+        :param failed: (start_register, length) of each part of the block that failed to read, for blocks read in
+            several requests. `data` holds zeros there.
+        """
+        self.function_code = function_code
+        self.start_register = start_register
+        self.unit_id = unit_id
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.length = len(data)
+        self.failed = list(failed)
+
+        if self.is_bits:
+            self.payload = pack_bits(data)
+        elif isinstance(data, array) and data.typecode == 'H':
+            self.payload = data
+        else:
+            self.payload = array('H', data)
+
+    @property
+    def is_bits(self):
+        return self.function_code in BIT_FUNCTION_CODES
+
+    @property
+    def block_key(self):
+        """
+        Identifies the polled block, so results of the same block can replace each other.
+        """
+        return self.unit_id, self.function_code, self.start_register, self.length
+
+    def __len__(self):
+        return self.length
+
+    def __bool__(self):
+        return self.length > 0
+
+    def is_failed(self, address, count=1):
+        """
+        :return: True if any of the `count` registers from `address` is in a part of the block that failed to read.
+        """
+        return any(start < address + count and address < start + length for start, length in self.failed)
+
+    @property
+    def bitmask(self):
+        """
+        :return: The bits as one int, bit 0 being the first coil. Only meaningful for bit reads.
+        """
+        return int.from_bytes(self.payload, "little")
+
+    def memoryview(self):
+        """
+        :return: Zero copy view of the payload. Registers are viewed as unsigned shorts in native byte order, bits as
+            the packed bytes.
+        """
+        return memoryview(self.payload)
+
+    def values(self):
+        """
+        :return: The registers as the stored `array('H')` (no copy), or the bits unpacked to a list of bools.
+        """
+        if self.is_bits:
+            return unpack_bits(self.payload, self.length)
+        return self.payload
+
+    def __repr__(self):
+        return f"PollResult(function_code={self.function_code}, start_register={self.start_register}, " \
+               f"unit_id={self.unit_id}, length={self.length})"
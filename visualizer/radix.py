@@ -0,0 +1,66 @@
+NUM_BASE_PREFIXES = {2: "0b", 8: "0o", 16: "0x"}
+FORMAT_TYPES = {2: "b", 8: "o", 10: "d", 16: "X"}  # Built in format() presentation types for each supported base.
+BITS_PER_DIGIT = {2: 1, 8: 3, 16: 4}
+
+
+def digit_to_char(digit):
+    if digit < 10:
+        return str(digit)
+    return chr(ord('a') + digit - 10)
+
+
+def str_base(number, base):
+    """
+    Lower case digits of `number` in any base from 2 to 36, with a leading '-' for negative numbers.
+    """
+    if base in FORMAT_TYPES:
+        return format(number, FORMAT_TYPES[base].lower())
+
+    if number < 0:
+        return '-' + str_base(-number, base)
+
+    digits = []
+    while True:
+        number, m = divmod(number, base)
+        digits.append(digit_to_char(m))
+        if number == 0:
+            return ''.join(reversed(digits))
+
+
+def pad_length(size, base):
+    """
+    Number of digits needed to show any `size` byte value in `base`, e.g. 4 for a 16 bit value in hexadecimal. Only
+    prefixed bases are padded.
+    """
+    if base not in BITS_PER_DIGIT:
+        return 0
+    return -(-size * 8 // BITS_PER_DIGIT[base])
+
+
+def make_renderer(size, base=10, is_float=False, signed=True):
+    """
+    Build a function that renders a whole sequence of values to display strings in one pass, using built in format
+    specs instead of per-digit Python work.
+
+    Prefixed bases (2, 8, 16) are zero padded to the full width of a `size` byte value and upper case, with the sign in
+    front of the prefix (e.g. "-0x00FF"). Decimal integers and floats render like `str`.
+
+    :param size: Size of each value in bytes (2, 4 or 8).
+    :param base: Radix for integers. Ignored for floats. Bases other than 2, 8, 10 and 16 fall back to `str_base`.
+    :param signed: Whether values may be negative. Unsigned values take a faster path.
+    :return: Function taking a sequence of values and returning a list of strings.
+    """
+    if is_float or base == 10:
+        return lambda values: list(map(str, values))
+
+    if base not in FORMAT_TYPES:
+        return lambda values: [str_base(v, base) for v in values]
+
+    prefix = NUM_BASE_PREFIXES[base]
+    spec = f"0{pad_length(size, base)}{FORMAT_TYPES[base]}"
+    render_one = (prefix + "{:" + spec + "}").format
+
+    if not signed:
+        return lambda values: list(map(render_one, values))
+
+    return lambda values: [render_one(v) if v >= 0 else "-" + render_one(-v) for v in values]
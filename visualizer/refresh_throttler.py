@@ -0,0 +1,60 @@
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal, pyqtSlot
+
+from visualizer.constants import DEFAULT_REFRESH_RATE
+
+
+class RefreshThrottler(QObject):
+    """
+    Sits between the worker and the display. Every result is passed straight on through `sample_available` (for
+    loggers and anything else that needs every sample), while `refresh` carries only the latest result of each block,
+    at most `rate` times a second. However fast the worker polls, the display does a bounded amount of work.
+
+    A result arriving after a quiet period is shown immediately. Results arriving while the display is being throttled
+    wait for the next frame, replacing any older result of the same block.
+    """
+    sample_available = pyqtSignal(object)
+    refresh = pyqtSignal(object)
+
+    def __init__(self, rate=DEFAULT_REFRESH_RATE, parent=None):
+        super().__init__(parent)
+        self.pending = {}  # block key -> latest result not shown yet
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.flush)
+        self.set_rate(rate)
+
+    def set_rate(self, rate):
+        """
+        :param rate: Maximum refreshes per second.
+        """
+        self.rate = rate
+        self.timer.setInterval(max(1, int(1000 / rate)))
+
+    def submit(self, result, key=None):
+        """
+        :param result: A result to display.
+        :param key: Identifies the block of the result. Results with the same key replace each other.
+        """
+        self.sample_available.emit(result)
+
+        if self.timer.isActive():
+            self.pending[key] = result
+        else:
+            self.refresh.emit(result)
+            self.timer.start()  # Throttle whatever follows for one frame.
+
+    @pyqtSlot()
+    def flush(self):
+        if not self.pending:
+            self.timer.stop()  # Quiet for a whole frame, show the next result immediately.
+            return
+
+        pending = self.pending
+        self.pending = {}
+        for result in pending.values():
+            self.refresh.emit(result)
+
+    def clear(self):
+        """
+        Drop results that haven't been shown yet, e.g. after the display was cleared.
+        """
+        self.pending = {}
@@ -0,0 +1,107 @@
+from array import array
+
+from visualizer.codec import get_decode_plan
+from visualizer.utils import changed_values, interleave_blanks
+
+
+class RegisterImage:
+    """
+    The raw registers of the polled block, decoded to display strings only when a cell is asked for. Each cell's string
+    is memoized until its registers change or the display settings change. A settings change just starts a new
+    generation of the memo, so it costs nothing until cells are displayed again.
+    """
+    def __init__(self, dtype='H', byte_order='>', word_order='>', base=10):
+        self.registers = array('H')
+        self.start_register = 0
+        self.failed = []  # (first, end) cell ranges that failed to read and are shown blank
+        self.generation = 0
+        self.memo = {}  # cell index -> display string, for the current generation
+        self.settings = None
+        self.set_display(dtype, byte_order, word_order, base)
+
+    def __len__(self):
+        return len(self.registers)
+
+    def set_display(self, dtype, byte_order='>', word_order='>', base=10):
+        """
+        :return: True if the settings changed, in which case a new generation starts and every cell is decoded again.
+        """
+        settings = (dtype, byte_order, word_order, base)
+        if settings == self.settings:
+            return False
+
+        self.settings = settings
+        self.width = get_decode_plan(dtype).size // 2  # Registers per value
+        self.generation += 1
+        self.memo = {}
+        return True
+
+    def update(self, data, start_register=None, failed=()):
+        """
+        Replace the registers with a new poll of the block.
+
+        :param data: Sequence of registers.
+        :param start_register: Address of the first register, unchanged if None.
+        :param failed: (start_register, length) of each part of the block that failed to read. Values that touch them
+            are shown blank.
+        :return: Indices of the cells whose value changed. Every cell if the block moved, changed size or failed in
+            different places.
+        """
+        data = data if isinstance(data, array) and data.typecode == 'H' else array('H', data)
+        moved = start_register is not None and start_register != self.start_register
+        if start_register is not None:
+            self.start_register = start_register
+        failed = sorted((start - self.start_register, start - self.start_register + length) for start, length in failed)
+
+        if moved or len(data) != len(self.registers) or failed != self.failed:
+            self.registers = data
+            self.failed = failed
+            self.memo = {}
+            return list(range(len(data)))
+
+        changed = [i * self.width for i in changed_values(self.registers, data, width=self.width)]
+        self.registers = data
+        for cell in changed:
+            self.memo.pop(cell, None)
+        return changed
+
+    def text(self, cell):
+        """
+        :return: Display string of one cell, decoded on first use. The second cell of a 32 bit value and registers at
+            the end that don't fill a whole value are blank.
+        """
+        try:
+            return self.memo[cell]
+        except KeyError:
+            return self.texts(cell, 1)[0]
+
+    def texts(self, first, count):
+        """
+        Display strings of `count` cells starting at `first`. Cells that aren't memoized yet are decoded together in one
+        batch, so rendering a whole visible range costs one decode.
+        """
+        last = min(first + count, len(self.registers))
+        cells = range(first, last)
+        if all(cell in self.memo for cell in cells):
+            return [self.memo[cell] for cell in cells] + [''] * (count - len(cells))
+
+        # Widen to whole values so a 32 bit value is never split.
+        width = self.width
+        start = first - first % width
+        end = min(last + (-last % width), len(self.registers) - len(self.registers) % width)
+
+        if end > start:
+            dtype, byte_order, word_order, base = self.settings
+            plan = get_decode_plan(dtype, byte_order, word_order, end - start, base)
+            for offset, string in enumerate(interleave_blanks(plan.render(plan.decode(self.registers[start:end])),
+                                                              plan.size)):
+                self.memo[start + offset] = string
+
+            for failed_first, failed_end in self.failed:
+                for cell in range(max(start, failed_first - failed_first % width), min(end, failed_end)):
+                    self.memo[cell] = ''
+
+        for cell in range(max(start, end), last):
+            self.memo[cell] = ''  # Registers that don't fill a whole value.
+
+        return [self.memo.get(cell, '') for cell in cells] + [''] * (count - len(cells))
@@ -0,0 +1,101 @@
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+
+from visualizer.register_image import RegisterImage
+
+TABLE_COLUMNS = 10  # Registers per row of the poll table.
+
+
+class RegisterTableModel(QAbstractTableModel):
+    """
+    Table model over a `RegisterImage`, laid out `TABLE_COLUMNS` registers per row with each row headed by the address
+    of its first register. Views only ask for the cells they show, so cells are decoded as they scroll into view and a
+    whole 65,536 register image costs no more per visible cell than a small one.
+    """
+    cell_edited = pyqtSignal(int, str)  # Register address, text entered.
+
+    def __init__(self, parent=None, columns=TABLE_COLUMNS):
+        super().__init__(parent)
+        self.columns = columns
+        self.image = RegisterImage()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else (len(self.image) + self.columns - 1) // self.columns
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.columns
+
+    def cell(self, index):
+        return index.row() * self.columns + index.column()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            cell = self.cell(index)
+            return self.image.text(cell) if cell < len(self.image) else ""
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return f"+{section}"
+        return str(self.image.start_register + section * self.columns)
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if self.cell(index) < len(self.image):
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        """
+        Edits aren't applied to the table. They are handed on as `cell_edited` to become write requests, and the table
+        shows the new value once it is polled back.
+        """
+        if role != Qt.EditRole or not index.isValid():
+            return False
+        self.cell_edited.emit(self.image.start_register + self.cell(index), str(value))
+        return False
+
+    def set_display(self, dtype, byte_order='>', word_order='>', base=10):
+        if self.image.set_display(dtype, byte_order, word_order, base) and len(self.image):
+            self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, self.columns - 1))
+
+    def set_data(self, data, start_register, failed=()):
+        """
+        Show a new poll. Only the rows holding changed registers are announced, merged into as few `dataChanged` ranges
+        as possible.
+
+        :param failed: Parts of the block that failed to read, see `RegisterImage.update`.
+        :return: Indices of the cells that changed.
+        """
+        if start_register != self.image.start_register or len(data) != len(self.image):
+            self.beginResetModel()
+            changed = self.image.update(data, start_register, failed)
+            self.endResetModel()
+            return changed
+
+        changed = self.image.update(data, failed=failed)
+        for first_row, last_row in row_ranges(changed, self.columns):
+            self.dataChanged.emit(self.index(first_row, 0), self.index(last_row, self.columns - 1))
+        return changed
+
+    def clear(self):
+        self.beginResetModel()
+        self.image.update([])
+        self.endResetModel()
+
+
+def row_ranges(cells, columns):
+    """
+    Merge cell indices into ranges of adjacent rows.
+
+    :param cells: Sorted cell indices.
+    :return: List of (first_row, last_row) tuples.
+    """
+    ranges = []
+    for row in (cell // columns for cell in cells):
+        if ranges and row <= ranges[-1][1] + 1:
+            ranges[-1][1] = row
+        else:
+            ranges.append([row, row])
+    return [tuple(r) for r in ranges]
@@ -0,0 +1,79 @@
+from visualizer.constants import MAX_READ_LENGTH, DEFAULT_GAP_FILL
+
+
+def plan_reads(blocks, gap_fill=DEFAULT_GAP_FILL, unit_id=255):
+    """
+    Merge a scan list of register blocks into the fewest reads the protocol allows.
+
+    Blocks sharing a unit ID and function code are sorted by address and merged whenever the gap between them is at
+    most `gap_fill` registers and the merged read still fits in `MAX_READ_LENGTH` for that function code.
+
+    :param blocks: List of dicts with "function_code", "start_register", "length" and optionally "unit_id".
+    :param gap_fill: Number of unwanted registers a read may span to join two blocks.
+    :param unit_id: Unit ID used for blocks that don't specify their own.
+    :return: List of read dicts with "function_code", "start_register", "length", "unit_id" and "blocks", the indices
+        of the scan list blocks covered by the read.
+    """
+    groups = {}
+    for index, block in enumerate(blocks):
+        key = (block.get("unit_id", unit_id), block["function_code"])
+        groups.setdefault(key, []).append(index)
+
+    reads = []
+    for (uid, function_code), indices in groups.items():
+        max_length = MAX_READ_LENGTH.get(function_code, 1)
+        indices.sort(key=lambda i: blocks[i]["start_register"])
+
+        current = None
+        for i in indices:
+            start = blocks[i]["start_register"]
+            end = start + blocks[i]["length"]
+
+            if current is not None:
+                current_end = current["start_register"] + current["length"]
+                merged_length = max(end, current_end) - current["start_register"]
+                if start - current_end <= gap_fill and merged_length <= max_length:
+                    current["length"] = merged_length
+                    current["blocks"].append(i)
+                    continue
+
+            current = {"function_code": function_code,
+                       "start_register": start,
+                       "length": end - start,
+                       "unit_id": uid,
+                       "blocks": [i]}
+            reads.append(current)
+
+    return reads
+
+
+def fan_out(blocks, reads, results):
+    """
+    Split the data returned for each planned read back into the blocks of the scan list.
+
+    :param blocks: The scan list passed to `plan_reads`.
+    :param reads: The reads returned by `plan_reads`.
+    :param results: The data returned for each read, in the same order as `reads`. Failed reads should be empty.
+    :return: List with the data of each block, in scan list order. Blocks whose read failed are `None`.
+    """
+    per_block = [None] * len(blocks)
+    for read, data in zip(reads, results):
+        if not data:
+            continue
+
+        for i in read["blocks"]:
+            offset = blocks[i]["start_register"] - read["start_register"]
+            per_block[i] = data[offset:offset + blocks[i]["length"]]
+
+    return per_block
+
+
+def split_read(function_code, start_register, length):
+    """
+    Split a read of any length into consecutive chunks that each fit in a single request.
+
+    :return: List of (start_register, length) tuples covering the whole read in address order.
+    """
+    max_length = MAX_READ_LENGTH.get(function_code, length)
+    return [(start, min(max_length, start_register + length - start))
+            for start in range(start_register, start_register + length, max_length)]
@@ -0,0 +1,134 @@
+import math
+import time
+
+SKIP = "skip"  # After an overrun, drop the missed cycles and realign to the original schedule.
+CATCH_UP = "catch_up"  # After an overrun, run the missed cycles back to back until the schedule is met again.
+
+
+class DeadlineScheduler:
+    """
+    Schedules cycles on absolute monotonic deadlines spaced exactly `interval` seconds apart, so time spent polling
+    never pushes later cycles back. Also tracks the achieved period and the jitter of each cycle start.
+    """
+    def __init__(self, interval, overrun_policy=SKIP, clock=time.monotonic):
+        if overrun_policy not in (SKIP, CATCH_UP):
+            raise ValueError(f"Unknown overrun policy: {overrun_policy}")
+
+        self.interval = interval
+        self.overrun_policy = overrun_policy
+        self.clock = clock
+        self.start()
+
+    def start(self):
+        """
+        (Re)start the schedule with the first deadline due immediately and clear the statistics.
+        """
+        self.next_deadline = self.clock()
+        self.last_start = None
+        self.cycles = 0
+        self.overruns = 0
+        self.skipped = 0
+        self._period_sum = 0.0
+        self._min_period = math.inf
+        self._max_period = 0.0
+        self._lateness_sum = 0.0
+        self._lateness_sq_sum = 0.0
+        self._max_lateness = 0.0
+
+    def time_until_next(self):
+        return max(0.0, self.next_deadline - self.clock())
+
+    def tick(self):
+        """
+        Mark the start of a cycle. Records the lateness of the cycle relative to its deadline and schedules the next
+        deadline according to the overrun policy.
+        """
+        now = self.clock()
+
+        lateness = now - self.next_deadline
+        self._lateness_sum += lateness
+        self._lateness_sq_sum += lateness * lateness
+        self._max_lateness = max(self._max_lateness, lateness)
+
+        if self.last_start is not None:
+            period = now - self.last_start
+            self._period_sum += period
+            self._min_period = min(self._min_period, period)
+            self._max_period = max(self._max_period, period)
+        self.last_start = now
+        self.cycles += 1
+
+        self.next_deadline += self.interval
+        if self.interval > 0 and now > self.next_deadline:
+            self.overruns += 1
+            if self.overrun_policy == SKIP:
+                missed = math.ceil((now - self.next_deadline) / self.interval)
+                self.skipped += missed
+                self.next_deadline += missed * self.interval
+
+    def stats(self):
+        """
+        :return: dict with the number of cycles, overruns and skipped cycles, the mean/min/max achieved period, and the
+            mean, standard deviation (jitter) and maximum of the cycle start lateness. Times are in seconds.
+        """
+        periods = self.cycles - 1
+        mean_lateness = self._lateness_sum / self.cycles if self.cycles else 0.0
+        variance = self._lateness_sq_sum / self.cycles - mean_lateness ** 2 if self.cycles else 0.0
+
+        return {"cycles": self.cycles,
+                "overruns": self.overruns,
+                "skipped": self.skipped,
+                "mean_period": self._period_sum / periods if periods > 0 else 0.0,
+                "min_period": self._min_period if periods > 0 else 0.0,
+                "max_period": self._max_period,
+                "mean_lateness": mean_lateness,
+                "jitter": math.sqrt(max(variance, 0.0)),
+                "max_lateness": self._max_lateness}
+
+
+class MultiRateScheduler:
+    """
+    Runs one `DeadlineScheduler` per distinct interval so blocks polled at different rates share a single timeline.
+    Each rate keeps its own absolute deadlines, so time spent on slow blocks never shifts the schedule of fast ones.
+    """
+    def __init__(self, intervals, overrun_policy=SKIP, clock=time.monotonic):
+        """
+        :param intervals: Poll interval of each block, in seconds.
+        """
+        self.clock = clock
+        self.groups = {}  # interval -> indices of the blocks polled at that interval
+        for index, interval in enumerate(intervals):
+            self.groups.setdefault(interval, []).append(index)
+
+        self.schedulers = {interval: DeadlineScheduler(interval, overrun_policy=overrun_policy, clock=clock)
+                           for interval in sorted(self.groups)}
+
+    def start(self):
+        for scheduler in self.schedulers.values():
+            scheduler.start()
+
+    def time_until_next(self):
+        return min(scheduler.time_until_next() for scheduler in self.schedulers.values())
+
+    def tick(self):
+        """
+        Start a cycle for every rate whose deadline has come.
+
+        :return: Indices of the blocks due this cycle, fastest rate first.
+        """
+        now = self.clock()
+        due = []
+        for interval, scheduler in self.schedulers.items():  # Sorted by interval, so the fastest come first.
+            if scheduler.next_deadline <= now:
+                scheduler.tick()
+                due.extend(self.groups[interval])
+        return due
+
+    def stats(self):
+        """
+        :return: The `DeadlineScheduler.stats` of the fastest rate, with the stats of every rate under "per_interval".
+        """
+        per_interval = {interval: scheduler.stats() for interval, scheduler in self.schedulers.items()}
+        stats = dict(per_interval[min(per_interval)])
+        stats["per_interval"] = per_interval
+        return stats
@@ -0,0 +1,192 @@
+import csv
+import struct
+from math import inf, nan
+from operator import itemgetter
+
+from visualizer.constants import TAG_TYPES, TAG_BYTE_ORDERS, REGISTER_TYPE_TO_READ_FUNCTION_CODE, DEFAULT_GAP_FILL, \
+    DERIVED_TAG_TYPE
+from visualizer.scan_planner import plan_reads
+from visualizer.transforms import TransformPipeline
+
+
+def parse_tag(row):
+    """
+    Build a tag from one row of a tag map file. Only "name" and "address" are required, or "name", "type" and
+    "expression" for derived tags.
+
+    :param row: dict with "name", "address" and optionally "type" (a `TAG_TYPES` key or `DERIVED_TAG_TYPE`),
+        "byte_order", "word_order" (a `TAG_BYTE_ORDERS` key), "scale", "offset", "min" and "max" (limits the scaled
+        value is clamped to), "bit" (for BIT tags), "expression" (for derived tags), "register_type" and "unit_id".
+    :raises ValueError: When a field can't be parsed.
+    :return: Tag dict.
+    """
+    def field(key, default):
+        value = row.get(key)
+        return default if value is None or str(value).strip() == "" else str(value).strip()
+
+    tag_type = field("type", "U16").upper()
+    if tag_type == DERIVED_TAG_TYPE:
+        if not field("name", "") or not field("expression", ""):
+            raise ValueError("Derived tags need a name and an expression")
+        return {"name": field("name", ""), "type": tag_type, "expression": field("expression", "")}
+
+    register_type = field("register_type", "Holding Registers")
+    if tag_type not in TAG_TYPES:
+        raise ValueError(f"Unknown tag type: {tag_type}")
+    if register_type not in ("Holding Registers", "Input Registers"):
+        raise ValueError(f"Tags must be in holding or input registers, not {register_type}")
+
+    tag = {"name": field("name", ""),
+           "address": int(field("address", ""), 0),
+           "type": tag_type,
+           "byte_order": TAG_BYTE_ORDERS[field("byte_order", ">").lower()],
+           "word_order": TAG_BYTE_ORDERS[field("word_order", ">").lower()],
+           "scale": float(field("scale", 1)),
+           "offset": float(field("offset", 0)),
+           "min": float(field("min", "-inf")),
+           "max": float(field("max", "inf")),
+           "bit": int(field("bit", 0)),
+           "function_code": REGISTER_TYPE_TO_READ_FUNCTION_CODE[register_type]}
+
+    if row.get("unit_id") not in (None, ""):
+        tag["unit_id"] = int(row["unit_id"])
+    if not tag["name"]:
+        raise ValueError(f"Tag at address {tag['address']} has no name")
+    if not 0 <= tag["bit"] < 16:
+        raise ValueError(f"Bit of tag {tag['name']} must be between 0 and 15")
+    if not tag["min"] <= tag["max"]:
+        raise ValueError(f"Min of tag {tag['name']} is above its max")
+    if not (0 <= tag["address"] and tag["address"] + tag_registers(tag) <= 65536):
+        raise ValueError(f"Tag {tag['name']} at address {tag['address']} doesn't fit in registers 0 to 65535")
+
+    return tag
+
+
+def load_tag_map(path):
+    """
+    Read tags from a CSV file with a header row naming the `parse_tag` fields.
+
+    :raises ValueError: When a row can't be parsed. The message includes the line number.
+    :return: List of tag dicts.
+    """
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        tags = []
+        for row in reader:
+            try:
+                tags.append(parse_tag(row))
+            except (ValueError, KeyError) as e:
+                raise ValueError(f"{path} line {reader.line_num}: {e}") from e
+
+    return tags
+
+
+def tag_registers(tag):
+    return struct.calcsize(">" + TAG_TYPES[tag["type"]]) // 2
+
+
+def tag_byte_indices(tag, start_register):
+    """
+    Positions, in the big endian bytes of a read starting at `start_register`, of the bytes of `tag` reordered so they
+    can be unpacked as one big endian value.
+    """
+    first = tag["address"] - start_register
+    registers = list(range(first, first + tag_registers(tag)))
+    if tag["word_order"] == "<":
+        registers.reverse()
+
+    indices = []
+    for r in registers:
+        indices.extend((2 * r, 2 * r + 1) if tag["byte_order"] == ">" else (2 * r + 1, 2 * r))
+    return indices
+
+
+class TagBlockPlan:
+    """
+    Decodes every tag covered by one read in a single pass. The byte order of each tag is normalised by one precomputed
+    byte gather over the whole read, after which a single struct unpacks all the tags at once. Values are raw, scaling
+    is left to the `TransformPipeline` of the `TagMap`.
+    """
+    def __init__(self, tags, start_register, length):
+        self.tags = tags
+        self.names = [t["name"] for t in tags]
+        self.packer = struct.Struct(f">{length}H")
+
+        indices = [i for t in tags for i in tag_byte_indices(t, start_register)]
+        self.gather = itemgetter(*indices) if len(indices) > 1 else lambda raw: (raw[indices[0]],)
+        self.unpacker = struct.Struct(">" + "".join(TAG_TYPES[t["type"]] for t in tags))
+
+        # Only tags that need it get any work after the unpack.
+        self.bits = [(i, t["bit"]) for i, t in enumerate(tags) if t["type"] == "BIT"]
+
+    def decode(self, data):
+        """
+        :param data: Registers of the whole read.
+        :return: List of the value of each tag, in the order of `tags`.
+        """
+        values = list(self.unpacker.unpack(bytes(self.gather(self.packer.pack(*data)))))
+        for i, bit in self.bits:
+            values[i] = values[i] >> bit & 1
+        return values
+
+
+class TagMap:
+    """
+    A set of named, typed tags compiled into the scan list that reads them and one `TagBlockPlan` per block of that
+    scan list. Decoded tags are scaled and clamped, and derived tags evaluated from them, by one `TransformPipeline`.
+    """
+    def __init__(self, tags, gap_fill=DEFAULT_GAP_FILL, unit_id=255):
+        names = [t["name"] for t in tags]
+        duplicates = sorted({n for n in names if names.count(n) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate tag names: {', '.join(duplicates)}")
+
+        derived = [(t["name"], t["expression"]) for t in tags if t["type"] == DERIVED_TAG_TYPE]
+        tags = [t for t in tags if t["type"] != DERIVED_TAG_TYPE]
+
+        self.tags = tags
+        extents = [{"function_code": t["function_code"], "start_register": t["address"], "length": tag_registers(t),
+                    "unit_id": t.get("unit_id", unit_id)} for t in tags]
+        reads = plan_reads(extents, gap_fill=gap_fill, unit_id=unit_id)
+
+        # Each planned read becomes one scan list block, so the poller reads exactly the registers the tags need.
+        self.blocks = [{k: r[k] for k in ("function_code", "start_register", "length", "unit_id")} for r in reads]
+        self.plans = [TagBlockPlan([tags[i] for i in r["blocks"]], r["start_register"], r["length"]) for r in reads]
+
+        decoded = [t for plan in self.plans for t in plan.tags]
+        limits = [(t["scale"], t["offset"], t["min"], t["max"]) if t["type"] != "BIT" else (1.0, 0.0, -inf, inf)
+                  for t in decoded]
+        scale, offset, low, high = zip(*limits) if limits else ((), (), (), ())
+        self.transform = TransformPipeline(len(decoded), names=[t["name"] for t in decoded], scale=scale,
+                                           offset=offset, low=low, high=high, derived=derived)
+        # Tags the pipeline leaves unchanged keep their decoded value, so integers aren't shown as floats.
+        self.unscaled = [limit == (1.0, 0.0, -inf, inf) for limit in limits]
+
+    @classmethod
+    def from_file(cls, path, gap_fill=DEFAULT_GAP_FILL, unit_id=255):
+        return cls(load_tag_map(path), gap_fill=gap_fill, unit_id=unit_id)
+
+    def decode(self, block_data):
+        """
+        :param block_data: Data of each block in `blocks`, as emitted by `ModbusWorker.scan_data_available`. `None` for
+            blocks that haven't been read successfully.
+        :return: dict of tag name -> value, `None` for tags in blocks without data. Derived tags come last and are NaN
+            when a tag they use has no data.
+        """
+        names = []
+        raw = []
+        for plan, data in zip(self.plans, block_data):
+            names.extend(plan.names)
+            raw.extend(plan.decode(data) if data else [None] * len(plan.names))
+
+        scaled, derived = self.transform.apply([nan if v is None else v for v in raw])
+        values = dict(zip(names, [r if r is None or unscaled else s
+                                  for r, s, unscaled in zip(raw, scaled.tolist(), self.unscaled)]))
+        values.update((name, float(value)) for name, value in derived.items())
+        return values
+
+    def take_errors(self):
+        """
+        :return: List of the messages of derived tags that failed to evaluate since the last call.
+        """
+        return self.transform.take_errors()
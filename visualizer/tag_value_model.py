@@ -0,0 +1,58 @@
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from visualizer.register_table_model import row_ranges
+
+TAG_VALUE_HEADERS = ("Tag", "Value")
+
+
+class TagValueModel(QAbstractTableModel):
+    """
+    Table of the latest value of each tag of a tag map, one row per tag. Only the rows whose value changed are
+    announced, so an unchanging tag map costs nothing to refresh.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.names = []
+        self.values = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.names)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(TAG_VALUE_HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if index.column() == 0:
+            return self.names[index.row()]
+        value = self.values[index.row()]
+        return "" if value is None else str(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return TAG_VALUE_HEADERS[section]
+        return None
+
+    def set_values(self, tag_values):
+        """
+        :param tag_values: dict of tag name -> value, as returned by `TagMap.decode`.
+        """
+        names = list(tag_values)
+        values = list(tag_values.values())
+        if names != self.names:
+            self.beginResetModel()
+            self.names = names
+            self.values = values
+            self.endResetModel()
+            return
+
+        # NaN, e.g. a derived tag without data, counts as unchanged.
+        changed = [row for row, (old, new) in enumerate(zip(self.values, values))
+                   if old != new and not (old != old and new != new)]
+        self.values = values
+        for first_row, last_row in row_ranges(changed, 1):
+            self.dataChanged.emit(self.index(first_row, 1), self.index(last_row, 1))
+
+    def clear(self):
+        self.set_values({})
@@ -0,0 +1,155 @@
+import ast
+
+import numpy as np
+
+# Functions available to derived value expressions. All of them work element wise on whole arrays.
+EXPRESSION_FUNCTIONS = {"abs": np.abs,
+                        "sqrt": np.sqrt,
+                        "exp": np.exp,
+                        "log": np.log,
+                        "log10": np.log10,
+                        "sin": np.sin,
+                        "cos": np.cos,
+                        "min": np.minimum,
+                        "max": np.maximum,
+                        "clip": np.clip}
+
+# Number of arguments each of `EXPRESSION_FUNCTIONS` takes.
+EXPRESSION_ARITY = {"abs": 1, "sqrt": 1, "exp": 1, "log": 1, "log10": 1, "sin": 1, "cos": 1, "min": 2, "max": 2,
+                    "clip": 3}
+
+# Syntax allowed in expressions, by ast node name. Numbers parse to Num before Python 3.8 and Constant after.
+EXPRESSION_NODES = {"Expression", "BinOp", "UnaryOp", "Call", "Name", "Load", "Num", "Constant", "Add", "Sub", "Mult",
+                    "Div", "FloorDiv", "Mod", "Pow", "USub", "UAdd"}
+
+
+def compile_expression(text, names, on_error=None):
+    """
+    Compile a derived value expression such as "V * I / 1000" or "sqrt(x ** 2 + y ** 2)". Only arithmetic, numbers,
+    the given names and `EXPRESSION_FUNCTIONS` are allowed.
+
+    :param text: The expression.
+    :param names: Names the expression may refer to.
+    :param on_error: Optional function called with a message the first time evaluating the expression fails.
+    :raises ValueError: When the expression doesn't parse or uses anything that isn't allowed.
+    :return: Function taking a dict of name -> value (scalar or numpy array) and returning the result, NaN when the
+        evaluation fails.
+    """
+    try:
+        tree = ast.parse(text.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid expression {text!r}: {e.msg}") from e
+
+    for node in ast.walk(tree):
+        node_type = type(node).__name__
+        if node_type not in EXPRESSION_NODES:
+            raise ValueError(f"Invalid expression {text!r}: {node_type} is not allowed")
+        if node_type in ("Num", "Constant") and not isinstance(getattr(node, "value", getattr(node, "n", None)),
+                                                                (int, float)):
+            raise ValueError(f"Invalid expression {text!r}: only numeric constants are allowed")
+        if isinstance(node, ast.Call) and (not isinstance(node.func, ast.Name) or node.keywords
+                                           or node.func.id not in EXPRESSION_FUNCTIONS):
+            raise ValueError(f"Invalid expression {text!r}: unknown function")
+        if isinstance(node, ast.Call) and len(node.args) != EXPRESSION_ARITY[node.func.id]:
+            raise ValueError(f"Invalid expression {text!r}: {node.func.id} takes "
+                             f"{EXPRESSION_ARITY[node.func.id]} argument(s), not {len(node.args)}")
+        if isinstance(node, ast.Name) and node.id not in names and node.id not in EXPRESSION_FUNCTIONS:
+            raise ValueError(f"Invalid expression {text!r}: unknown name {node.id}")
+
+    constants = FloatConstants()
+    code = compile(ast.fix_missing_locations(constants.visit(tree)), f"<expression {text}>", "eval")
+
+    failed = False
+
+    def evaluate(namespace):
+        nonlocal failed
+        try:
+            with np.errstate(over="ignore"):  # Overflow gives inf, which is a fine result for a derived value.
+                return eval(code, {"__builtins__": {}}, dict(EXPRESSION_FUNCTIONS, **constants.constants, **namespace))
+        except Exception as e:  # E.g. values of mismatched shapes. Reported once, not on every sample.
+            if on_error and not failed:
+                on_error(f"Failed to evaluate {text!r}: {e}")
+            failed = True
+            return np.nan
+    return evaluate
+
+
+class FloatConstants(ast.NodeTransformer):
+    """
+    Replaces the numeric constants of an expression by names bound to numpy floats. Arithmetic on constants alone then
+    overflows to inf like the rest of the expression, instead of using Python's unbounded integers, where something
+    like `9 ** 9 ** 9` would never finish.
+    """
+    def __init__(self):
+        self.constants = {}  # name -> value to evaluate the expression with
+
+    def bind(self, node, value):
+        name = f"__constant{len(self.constants)}"
+        self.constants[name] = np.float64(value)
+        return ast.copy_location(ast.Name(id=name, ctx=ast.Load()), node)
+
+    def visit_Constant(self, node):
+        return self.bind(node, node.value)
+
+    def visit_Num(self, node):  # Before Python 3.8
+        return self.bind(node, node.n)
+
+
+class TransformPipeline:
+    """
+    Converts decoded values to engineering units in batch: per value scale and offset, clamping, then derived values
+    computed from named values by compiled expressions. Works on one set of values or on a 2D array holding many
+    samples (one per row) at once.
+    """
+    def __init__(self, count, names=None, scale=1.0, offset=0.0, low=-np.inf, high=np.inf, derived=()):
+        """
+        :param count: Number of values per sample.
+        :param names: Optional name of each value, `None` for values expressions can't refer to.
+        :param scale: Scale of every value, or a sequence with the scale of each value. Same for `offset`, `low` and
+            `high`.
+        :param derived: Sequence of (name, expression) pairs. Expressions may use the named values and the derived
+            values before them.
+        :raises ValueError: When an expression is invalid or a name is also the name of one of `EXPRESSION_FUNCTIONS`.
+        """
+        self.count = count
+        self.scale = np.broadcast_to(np.asarray(scale, dtype=np.float64), (count,))
+        self.offset = np.broadcast_to(np.asarray(offset, dtype=np.float64), (count,))
+        self.low = np.broadcast_to(np.asarray(low, dtype=np.float64), (count,))
+        self.high = np.broadcast_to(np.asarray(high, dtype=np.float64), (count,))
+        self.names = {name: i for i, name in enumerate(names or []) if name is not None}
+        self.errors = []  # Evaluation errors not yet taken by `take_errors`
+
+        clashes = sorted(set(self.names).union(name for name, _ in derived).intersection(EXPRESSION_FUNCTIONS))
+        if clashes:
+            raise ValueError(f"Names clash with expression functions: {', '.join(clashes)}")
+
+        self.derived = []
+        known = set(self.names)
+        for name, expression in derived:
+            on_error = lambda msg, name=name: self.errors.append(f"Derived value {name}: {msg}")
+            self.derived.append((name, compile_expression(expression, known, on_error=on_error)))
+            known.add(name)
+
+    def apply(self, values):
+        """
+        :param values: Sequence of `count` values, or an array of shape (samples, count).
+        :return: Tuple of (scaled, derived). `scaled` is a float array shaped like `values`. `derived` is a dict of
+            name -> derived value, a float per sample.
+        """
+        scaled = np.asarray(values, dtype=np.float64) * self.scale + self.offset
+        np.clip(scaled, self.low, self.high, out=scaled)
+
+        namespace = {name: scaled[..., i] for name, i in self.names.items()}
+        derived = {}
+        for name, evaluate in self.derived:
+            namespace[name] = derived[name] = np.asarray(evaluate(namespace), dtype=np.float64)
+
+        return scaled, derived
+
+    def take_errors(self):
+        """
+        :return: List of the messages of expressions that failed to evaluate since the last call. Each expression is
+            reported once.
+        """
+        errors, self.errors = self.errors, []
+        return errors
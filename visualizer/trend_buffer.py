@@ -0,0 +1,77 @@
+import numpy as np
+
+from visualizer.constants import DEFAULT_TREND_CAPACITY
+
+
+class TrendBuffer:
+    """
+    Fixed-size history of a set of named series sampled together. Memory is allocated once, and once full each new
+    sample overwrites the oldest.
+
+    Each sample is written twice, at `i` and `i + capacity`, so the latest `capacity` samples are always one contiguous
+    slice and are handed out as numpy views without copying.
+    """
+    def __init__(self, names, capacity=DEFAULT_TREND_CAPACITY):
+        self.names = list(names)
+        self.capacity = capacity
+        self.times = np.zeros(2 * capacity)
+        self.values = np.full((len(self.names), 2 * capacity), np.nan)
+        self.head = 0  # Index the next sample is written at.
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, timestamp, values):
+        """
+        :param timestamp: Time of the sample in seconds. Samples must be appended in time order.
+        :param values: One value per name, `None` where there is no value.
+        """
+        row = np.array([np.nan if v is None else v for v in values], dtype=float)
+        for i in (self.head, self.head + self.capacity):
+            self.times[i] = timestamp
+            self.values[:, i] = row
+
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def series(self):
+        """
+        :return: Tuple of (times, values) of the samples held, oldest first. `values` has one row per name.
+        """
+        end = self.head + self.capacity
+        start = end - self.count
+        return self.times[start:end], self.values[:, start:end]
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+
+def minmax_decimate(times, values, start, end, width):
+    """
+    Reduce the samples between `start` and `end` to the minimum and maximum of each pixel column, so drawing costs the
+    same however many samples fall in the range. Spikes survive, because every sample counts towards the extremes of
+    its column.
+
+    :param times: Sorted sample times.
+    :param values: Array with one row of values per series, NaN where a series has no value.
+    :param width: Number of pixel columns.
+    :return: Tuple of (columns, low, high). `columns` holds the pixel column of each column that has samples, and
+        `low` and `high` hold the minimum and maximum of each series in those columns, NaN where a series has no
+        values in a column.
+    """
+    first = np.searchsorted(times, start, side="left")
+    last = np.searchsorted(times, end, side="right")
+    times = times[first:last]
+    values = values[:, first:last]
+    if not len(times) or width < 1 or end <= start:
+        empty = np.empty((len(values), 0))
+        return np.empty(0, dtype=np.intp), empty, empty
+
+    columns = ((times - start) * (width / (end - start))).astype(np.intp)
+    np.clip(columns, 0, width - 1, out=columns)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(columns)) + 1))
+
+    # fmin and fmax ignore NaN unless a whole column is NaN.
+    return columns[starts], np.fmin.reduceat(values, starts, axis=1), np.fmax.reduceat(values, starts, axis=1)
@@ -0,0 +1,155 @@
+import numpy as np
+from PyQt5.QtCore import Qt, QRect, QSize
+from PyQt5.QtGui import QPainter, QColor, QPen, QPolygonF
+from PyQt5.QtWidgets import QWidget
+
+from visualizer.constants import DEFAULT_TREND_CAPACITY, DEFAULT_TREND_SPAN
+from visualizer.trend_buffer import TrendBuffer, minmax_decimate
+
+TREND_BACKGROUND_COLOR = QColor(255, 255, 255)
+TREND_GRID_COLOR = QColor(225, 225, 225)
+TREND_TEXT_COLOR = QColor(80, 80, 80)
+TREND_LEGEND_COLOR = QColor(255, 255, 255, 200)
+TREND_COLORS = [QColor(31, 119, 180), QColor(255, 127, 14), QColor(44, 160, 44), QColor(214, 39, 40),
+                QColor(148, 103, 189), QColor(140, 86, 75), QColor(227, 119, 194), QColor(127, 127, 127),
+                QColor(188, 189, 34), QColor(23, 190, 207)]
+MARGINS = (70, 6, 10, 20)  # Left, top, right and bottom space around the plot area, for the axis labels.
+
+
+class TrendPlot(QWidget):
+    """
+    Live plot of the history of a set of series kept in a `TrendBuffer`. The latest `span` seconds are drawn through
+    `minmax_decimate`, so each frame draws at most two points per pixel column and series however much history is
+    held. The mouse wheel zooms the time span.
+
+    Samples are only stored by `append`. The plot is redrawn when `update` is called, so the caller decides the frame
+    rate.
+    """
+    def __init__(self, parent=None, capacity=DEFAULT_TREND_CAPACITY, span=DEFAULT_TREND_SPAN):
+        super().__init__(parent)
+        self.capacity = capacity
+        self.span = span
+        self.buffer = TrendBuffer([], capacity=1)
+        self.setMinimumSize(200, 120)
+
+    def sizeHint(self):
+        return QSize(600, 200)
+
+    @property
+    def names(self):
+        return self.buffer.names
+
+    def set_series(self, names):
+        """
+        Start a new history of the series `names`, dropping the current one.
+        """
+        self.buffer = TrendBuffer(names, capacity=self.capacity)
+        self.update()
+
+    def append(self, timestamp, values):
+        """
+        :param values: One value per series, `None` where there is no value.
+        """
+        if self.buffer.names:
+            self.buffer.append(timestamp, values)
+
+    def clear(self):
+        self.set_series([])
+
+    def plot_area(self):
+        left, top, right, bottom = MARGINS
+        return self.rect().adjusted(left, top, -right, -bottom)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), TREND_BACKGROUND_COLOR)
+        painter.setPen(TREND_TEXT_COLOR)
+
+        area = self.plot_area()
+        if not len(self.buffer) or area.width() < 1 or area.height() < 1:
+            painter.drawText(self.rect(), Qt.AlignCenter, "No trend data.")
+            return
+
+        times, values = self.buffer.series()
+        end = times[-1]
+        columns, low, high = minmax_decimate(times, values, end - self.span, end, area.width())
+
+        finite_low = low[np.isfinite(low)]
+        finite_high = high[np.isfinite(high)]
+        bottom = finite_low.min() if len(finite_low) else 0.0
+        top = finite_high.max() if len(finite_high) else 1.0
+        if top == bottom:
+            bottom, top = bottom - 1, top + 1
+
+        self.draw_axes(painter, area, bottom, top)
+
+        # Each column is drawn as a vertical stroke from its minimum to its maximum. Strokes alternate direction, so
+        # consecutive columns are joined at the same end by a short segment instead of a long diagonal.
+        x = np.repeat(area.left() + columns + 0.5, 2)
+        y_scale = area.height() / (top - bottom)
+        reverse = np.arange(len(columns)) % 2 == 1
+        ys = np.empty(len(x))
+        for row in range(len(values)):
+            ys[0::2] = np.where(reverse, high[row], low[row])
+            ys[1::2] = np.where(reverse, low[row], high[row])
+            y = area.bottom() + 1 - (ys - bottom) * y_scale
+
+            painter.setPen(QPen(TREND_COLORS[row % len(TREND_COLORS)], 0))  # Cosmetic pens take the fast path.
+            valid = np.isfinite(y)
+            edges = np.concatenate(([0], np.flatnonzero(valid[1:] != valid[:-1]) + 1, [len(y)]))
+            for first, last in zip(edges[:-1], edges[1:]):
+                if valid[first]:
+                    painter.drawPolyline(make_polygon(x[first:last], y[first:last]))  # Gaps where there is no data.
+
+        self.draw_legend(painter, area)
+
+    def draw_axes(self, painter, area, bottom, top):
+        metrics = painter.fontMetrics()
+        label_width = MARGINS[0] - 6
+        for fraction in (0.0, 0.5, 1.0):
+            y = area.bottom() - round(fraction * area.height())
+            painter.setPen(TREND_GRID_COLOR)
+            painter.drawLine(area.left(), y, area.right(), y)
+            painter.setPen(TREND_TEXT_COLOR)
+            label_top = min(max(0, y - metrics.height() // 2), area.bottom() - metrics.height())
+            painter.drawText(QRect(0, label_top, label_width, metrics.height()), Qt.AlignRight | Qt.AlignVCenter,
+                             f"{bottom + fraction * (top - bottom):.5g}")
+
+        text_top = area.bottom() + 4
+        painter.drawText(QRect(area.left(), text_top, area.width(), metrics.height()), Qt.AlignLeft,
+                         f"-{self.span:g} s")
+        painter.drawText(QRect(area.left(), text_top, area.width(), metrics.height()), Qt.AlignRight, "now")
+        painter.drawRect(area.adjusted(0, 0, -1, -1))
+
+    def draw_legend(self, painter, area):
+        line_height = painter.fontMetrics().height()
+        for row, name in enumerate(self.buffer.names):
+            y = area.top() + 4 + row * line_height
+            if y + line_height > area.bottom():
+                break  # No room for the rest.
+            painter.fillRect(area.left() + 2, y, painter.fontMetrics().width(name) + 22, line_height,
+                             TREND_LEGEND_COLOR)
+            painter.fillRect(area.left() + 6, y + line_height // 3, 10, line_height // 3,
+                             TREND_COLORS[row % len(TREND_COLORS)])
+            painter.setPen(TREND_TEXT_COLOR)
+            painter.drawText(area.left() + 20, y + painter.fontMetrics().ascent(), name)
+
+    def wheelEvent(self, event):
+        held = self.buffer.series()[0]
+        longest = max(DEFAULT_TREND_SPAN, held[-1] - held[0] if len(held) else 0.0)
+        factor = 1 / 1.25 if event.angleDelta().y() > 0 else 1.25
+        self.span = min(longest, max(1.0, self.span * factor))
+        self.update()
+
+
+def make_polygon(x, y):
+    """
+    Build a QPolygonF by filling its point buffer straight from numpy, instead of constructing a QPointF per point.
+    """
+    polygon = QPolygonF(len(x))
+    buffer = polygon.data()
+    buffer.setsize(len(x) * 2 * np.dtype(float).itemsize)
+    points = np.frombuffer(buffer, dtype=float).reshape(-1, 2)
+    points[:, 0] = x
+    points[:, 1] = y
+    return polygon
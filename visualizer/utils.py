@@ -2,24 +2,47 @@ import glob
 import serial
 import struct
 import sys
-from math import log, ceil
 
-from pymodbus.payload import BinaryPayloadBuilder
+from visualizer.bulk_write import encode_values, parse_number
+from visualizer.codec import get_decode_plan
 
-from visualizer.constants import RADIX_PREFIX
 
-def digit_to_char(digit):
-    if digit < 10:
-        return str(digit)
-    return chr(ord('a') + digit - 10)
+def unpack_registers(data, dtype:str, byte_order=">", word_order=">"):
+    """
+    Convert a list of 16 bit registers to the values of the specified struct data type. Registers at the end that
+    don't fill a whole value are dropped.
+
+    :param data: List of register values.
+    :param dtype: struct format character of the target data type.
+    :param byte_order: struct byte order character of the bytes within each register.
+    :param word_order: struct byte order character of the registers within each 32 bit value.
+    :return: Tuple of values.
+    """
+    return get_decode_plan(dtype, byte_order, word_order, len(data)).decode(data)
+
+def format_values(values, dtype:str, base=10):
+    """
+    Convert decoded values to the strings displayed in the poll table. 32 bit values are followed by a blank string
+    so each string lines up with the first register of its value.
 
-def str_base(number,base):
-    if number < 0:
-        return '-' + str_base(-number, base)
-    (d, m) = divmod(number, base)
-    if d > 0:
-        return str_base(d, base) + digit_to_char(m)
-    return digit_to_char(m)
+    :param values: Sequence of values as returned by `unpack_registers`.
+    :param dtype: struct format character of the values.
+    :param base: Radix to display integers in.
+    :return: List of strings.
+    """
+    return render_values(values, get_decode_plan(dtype, base=base))
+
+def render_values(values, plan):
+    """
+    `format_values` using the renderer of an already compiled `DecodePlan`.
+    """
+    return interleave_blanks(plan.render(values), plan.size)
+
+def interleave_blanks(formatted, size):
+    if size == 4:
+        # Leave every other cell blank since registers are combined in size 4
+        return [cell for num in formatted for cell in (num, '')]
+    return formatted
 
 def format_data(data, dtype:str, byte_order=">", word_order=">", base=10):
     """
@@ -32,99 +55,38 @@ def format_data(data, dtype:str, byte_order=">", word_order=">", base=10):
     :param base:
     :return:
     """
-    raw_byte_str = struct.pack(byte_order + 'H'*len(data), *data)
-    size = struct.calcsize(dtype)
-    stub = len(raw_byte_str) % size
-
-    if stub > 0:
-        byte_str = raw_byte_str[:-stub]  # lop off any segmented data that wont fit in target datatype
-    else:
-        byte_str = raw_byte_str[:]
-
-    fmt_len = len(byte_str) // size
-    if size == 4:
-        if (word_order == "<"):
-            byte_str = b"".join([ byte_str[i:i+2][::-1] for i in range(0,len(byte_str),2) ])
+    plan = get_decode_plan(dtype, byte_order, word_order, len(data), base)
+    return render_values(plan.decode(data), plan)
 
-        result = struct.unpack(word_order + dtype * fmt_len, byte_str)
-
-    else:
-        result = struct.unpack(">" + dtype*fmt_len, byte_str)
-
-    num_base_prefixes = {2: "0b", 8: "0o", 16: "0x"}
-
-    prefix = num_base_prefixes.get(base, "")
-    if prefix:
-        # pad_len -> https://math.stackexchange.com/questions/593670/proving-number-of-digits-d-to-represent-integer-n-in-base-b
-        pad_len = int(ceil( log(2**(size * 8), base) ))  # Putting the math degree to use.
-
-        formatted = []
-        for i in result:
-            num = str_base(i, base)
-            if num[0] == '-':
-                sign = '-'
-                num = num[1:]
-            else:
-                sign = ''
-
-            formatted.append(sign + prefix + num.upper().rjust(pad_len, '0'))
-        # formatted = [ prefix + str_base(i, base).rjust(pad_len, '0') for i in result ]
-
-    elif dtype == 'f':
-        formatted = [ str(i) for i in result ]  # Don't call `str_base` since base is always 10 for floats.
-                                                # And it causes strange formatted outputs for negative floats.
-    else:
-        formatted = [ str_base(i, base) for i in result ]
+def changed_values(old, new, width=1):
+    """
+    Find the values whose registers differ between two polls of the same block.
 
-    if size == 4:
-        copy = formatted[:]
-        formatted = []
-        for num in copy:
-            formatted.extend([num, ''])  # Leave every other cell blank since registers are combined in size 4
+    :param old: Previously polled data.
+    :param new: Newly polled data.
+    :param width: Number of registers (or bits) per value, 2 for 32 bit data types.
+    :return: Sorted list of value indices. Every value if the polls differ in length.
+    """
+    count = len(new) // width
+    if len(old) != len(new):
+        return list(range(count))
 
-    return formatted
+    changed = [i for i, (a, b) in enumerate(zip(old, new)) if a != b]
+    if width == 1:
+        return changed
+    return sorted({i // width for i in changed if i // width < count})
 
 def format_write_value(string, dtype='H', byte_order='>', word_order='>'):
-    builder = BinaryPayloadBuilder(byteorder=byte_order, wordorder=word_order)
-    builder_functions = {"H": builder.add_16bit_uint,
-                         "h": builder.add_16bit_int,
-                         "I": builder.add_32bit_uint,
-                         "i": builder.add_32bit_int,
-                         "f": builder.add_32bit_float}
-
-    num_txt = string[:]
-    sign = ''
-
-    if string[0] == '-':
-        sign = '-'
-        num_txt = string[1:]
-
-    radix = RADIX_PREFIX.get(num_txt[:2], 10)
-    if radix is not 10:
-        num_txt = string[2:]
-
-    vals = []
-    if dtype == 'f':
-        try:
-            val = float(sign + num_txt)
-        except ValueError:
-            return None
-    else:
-        try:
-            val = int(sign + num_txt, radix)
-        except ValueError:
-            return None
+    """
+    Encode one value typed into the poll table.
 
+    :return: List of registers, or None if `string` isn't a valid value of the data type.
+    """
     try:
-        builder_functions[dtype](val)
-    except struct.error:
+        return encode_values([parse_number(string.strip(), dtype)], dtype, byte_order=byte_order, word_order=word_order)
+    except (ValueError, OverflowError, struct.error):
         return None
 
-    builder.build()
-    payload = builder.to_registers()
-
-    return payload
-
 def serial_ports():
     """
         Thanks to: https://stackoverflow.com/questions/12090503/listing-available-com-ports-with-python
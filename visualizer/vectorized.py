@@ -0,0 +1,38 @@
+import numpy as np
+
+# numpy equivalents of the struct format characters in `STRUCT_DATA_TYPE`.
+NUMPY_DATA_TYPE = {"H": np.dtype(np.uint16),
+                   "h": np.dtype(np.int16),
+                   "L": np.dtype(np.uint32),
+                   "l": np.dtype(np.int32),
+                   "f": np.dtype(np.float32)}
+
+
+def decode_registers(data, dtype, byte_order=">", word_order=">"):
+    """
+    Vectorized equivalent of `utils.unpack_registers`. Decodes a whole register array in a handful of array operations
+    (a byteswap, a word merge and a dtype view) instead of per-register Python work.
+
+    :param data: Registers as a list, array('H') or numpy array.
+    :param dtype: struct format character of the target data type, one of the keys of `NUMPY_DATA_TYPE`.
+    :param byte_order: struct byte order character of the bytes within each register.
+    :param word_order: struct byte order character of the registers within each 32 bit value.
+    :return: numpy array of the decoded values. Registers at the end that don't fill a whole value are dropped.
+    """
+    target = NUMPY_DATA_TYPE[dtype]
+    words = np.asarray(data, dtype=np.uint16)
+
+    if byte_order == "<":
+        words = words.byteswap()
+
+    if target.itemsize == 2:
+        return words.view(target)
+
+    pairs = words[:len(words) - len(words) % 2].reshape(-1, 2)
+    if word_order == "<":
+        high, low = pairs[:, 1], pairs[:, 0]
+    else:
+        high, low = pairs[:, 0], pairs[:, 1]
+
+    combined = (high.astype(np.uint32) << 16) | low
+    return combined.view(target)
@@ -0,0 +1,53 @@
+from visualizer.constants import MAX_WRITE_LENGTH
+
+
+def coalesce_writes(requests):
+    """
+    Merge queued write requests into the fewest multiple register/coil writes.
+
+    Requests are applied in queue order to an image of each register space, so the last write to an address wins.
+    Contiguous addresses are then merged into single writes of at most `MAX_WRITE_LENGTH`. The merged writes go out in
+    the order of the latest queued request they contain, so a value queued last (e.g. a command register) is still
+    written last.
+
+    :param requests: List of write request dicts with "function_code", "start_register" and "values".
+    :return: List of write request dicts in the same format.
+    """
+    images = {}  # function code -> {address: value}
+    last_seen = {}  # (function code, address) -> queue position of the write that set the value
+
+    for position, req in enumerate(requests):
+        function_code = req["function_code"]
+        values = req["values"]
+        if not isinstance(values, (list, tuple)):
+            values = [values]  # Single coil edits carry a bare bool.
+
+        image = images.setdefault(function_code, {})
+        for offset, value in enumerate(values):
+            address = req["start_register"] + offset
+            image[address] = value
+            last_seen[(function_code, address)] = position
+
+    writes = []
+    for function_code, image in images.items():
+        max_length = MAX_WRITE_LENGTH.get(function_code, 1)
+        current = None
+
+        for address in sorted(image):
+            position = last_seen[(function_code, address)]
+            if current is not None and address == current["start_register"] + len(current["values"]) \
+                    and len(current["values"]) < max_length:
+                current["values"].append(image[address])
+                current["position"] = max(current["position"], position)
+            else:
+                current = {"function_code": function_code,
+                           "start_register": address,
+                           "values": [image[address]],
+                           "position": position}
+                writes.append(current)
+
+    writes.sort(key=lambda w: w["position"])
+    for w in writes:
+        del w["position"]
+
+    return writes